@@ -0,0 +1,136 @@
+"""
+Compares the outline/font section extractor with the Markdown pipeline on a
+corpus of PDFs: how much faster it is, how often it finds usable structure,
+and how closely its sections agree with those of pdf_to_json_pipeline.
+
+Run it from the fastapi_app directory, e.g.:
+
+    python -m benchmarks.chunking --corpus ~/arxiv-pdfs
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+import fitz
+from services.chunker.outline_parser import normalize, outline_to_dict
+from services.chunker.pdf_parser import pdf_to_json_pipeline
+from .corpus import CORPUS_DIR, generate_corpus, load_corpus
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--corpus", help="Directory of PDFs to use instead of the synthetic corpus"
+    )
+    parser.add_argument("--papers", type=int, default=8, help="Synthetic papers")
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+def text_overlap(a: str, b: str) -> float:
+    # Weighted Jaccard similarity of the two texts' words
+    words_a, words_b = Counter(a.lower().split()), Counter(b.lower().split())
+    union = sum((words_a | words_b).values())
+    return sum((words_a & words_b).values()) / union if union else 1.0
+
+
+def compare_sections(fast: list, reference: list) -> dict:
+    """
+    Matches sections by normalized header and measures how many agree and how
+    similar the text of the matched ones is.
+    """
+    fast_by_header = {normalize(section["header"]): section for section in fast}
+    reference_by_header = {
+        normalize(section["header"]): section for section in reference
+    }
+    matched = fast_by_header.keys() & reference_by_header.keys()
+    overlaps = [
+        text_overlap(fast_by_header[h]["text"], reference_by_header[h]["text"])
+        for h in matched
+    ]
+    return {
+        "header_precision": len(matched) / len(fast_by_header) if fast else 0.0,
+        "header_recall": (
+            len(matched) / len(reference_by_header) if reference else 0.0
+        ),
+        "text_overlap": statistics.mean(overlaps) if overlaps else 0.0,
+    }
+
+
+def benchmark_pdf(path: str) -> dict:
+    with fitz.open(path) as doc:
+        start = time.perf_counter()
+        fast = outline_to_dict(doc)
+        fast_seconds = time.perf_counter() - start
+        has_outline = bool(doc.get_toc())
+
+    with fitz.open(path) as doc:
+        start = time.perf_counter()
+        reference = pdf_to_json_pipeline(doc)
+        markdown_seconds = time.perf_counter() - start
+
+    result = {
+        "pdf": path,
+        "has_outline": has_outline,
+        "fast_path": fast is not None,
+        "outline_seconds": round(fast_seconds, 4),
+        "markdown_seconds": round(markdown_seconds, 4),
+        "sections": {"outline": len(fast or []), "markdown": len(reference)},
+    }
+    if fast is not None:
+        result.update(
+            {
+                key: round(value, 3)
+                for key, value in compare_sections(fast, reference).items()
+            }
+        )
+    return result
+
+
+def print_report(results: list) -> None:
+    print(
+        f"{'pdf':<40} {'outline':>7} {'fast':>5} {'outline s':>10} {'markdown s':>10}"
+        f" {'precision':>9} {'recall':>7} {'overlap':>7}"
+    )
+    for result in results:
+        print(
+            f"{result['pdf'][-40:]:<40} {str(result['has_outline']):>7}"
+            f" {str(result['fast_path']):>5} {result['outline_seconds']:>10}"
+            f" {result['markdown_seconds']:>10}"
+            f" {result.get('header_precision', '-'):>9}"
+            f" {result.get('header_recall', '-'):>7}"
+            f" {result.get('text_overlap', '-'):>7}"
+        )
+
+    hits = [result for result in results if result["fast_path"]]
+    fast_total = sum(result["outline_seconds"] for result in results)
+    markdown_total = sum(result["markdown_seconds"] for result in results)
+    print(f"\nFast path used for {len(hits)}/{len(results)} PDFs")
+    print(
+        f"Total: outline {fast_total:.2f}s, markdown {markdown_total:.2f}s"
+        f" ({markdown_total / fast_total:.1f}x faster)"
+    )
+    if hits:
+        for key in ("header_precision", "header_recall", "text_overlap"):
+            mean = statistics.mean(result[key] for result in hits)
+            print(f"Mean {key}: {mean:.3f}")
+
+
+def main() -> None:
+    args = parse_args()
+    if args.corpus:
+        pdf_paths = load_corpus(args.corpus)
+    else:
+        pdf_paths = generate_corpus(args.papers, CORPUS_DIR)
+
+    results = [benchmark_pdf(path) for path in pdf_paths]
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
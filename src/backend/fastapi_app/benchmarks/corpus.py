@@ -0,0 +1,131 @@
+import os
+import random
+from typing import List
+import fitz
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+CORPUS_VERSION = 2  # Bump when generated papers change, so old files aren't reused
+
+SECTION_HEADERS = [
+    "Introduction",
+    "Related Work",
+    "Background",
+    "Method",
+    "Experimental Setup",
+    "Results",
+    "Ablation Study",
+    "Discussion",
+    "Limitations",
+    "Conclusion",
+]
+
+VOCABULARY = (
+    "model data training network layer attention transformer gradient loss "
+    "accuracy benchmark dataset baseline parameter optimization inference "
+    "latency throughput representation embedding encoder decoder token "
+    "sequence convolution regularization evaluation performance significant "
+    "improvement proposed approach method results experiments analysis "
+    "we show that our the of and in to a with for on by is are this these "
+    "which outperforms compared against state art across tasks scale"
+).split()
+
+
+def generate_paragraph(rng: random.Random, num_sentences: int) -> str:
+    sentences = []
+    for _ in range(num_sentences):
+        words = rng.choices(VOCABULARY, k=rng.randint(12, 28))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def generate_paper(rng: random.Random, index: int) -> tuple:
+    """
+    Builds the HTML of an arXiv-like paper: a title, an abstract, numbered
+    sections of uneven length and a reference list.
+
+    Returns:
+        tuple: The HTML and the top-level section headers.
+    """
+    parts = [
+        f"<h1>Synthetic Paper {index}: On Scalable Summarization</h1>",
+        f"<p><b>Abstract.</b> {generate_paragraph(rng, 5)}</p>",
+    ]
+    num_sections = rng.randint(5, len(SECTION_HEADERS))
+    headers = [
+        f"{number} {header}"
+        for number, header in enumerate(SECTION_HEADERS[:num_sections], start=1)
+    ] + ["References"]
+    for header in headers[:-1]:
+        parts.append(f"<h2>{header}</h2>")
+        # A few long sections make the workload uneven, as in real papers
+        num_paragraphs = rng.choice([2, 3, 4, 12])
+        for _ in range(num_paragraphs):
+            parts.append(f"<p>{generate_paragraph(rng, rng.randint(4, 9))}</p>")
+    parts.append("<h2>References</h2>")
+    for number in range(1, 11):
+        parts.append(f"<p>[{number}] {generate_paragraph(rng, 1)}</p>")
+    return "\n".join(parts), headers
+
+
+def write_pdf(html: str, path: str) -> None:
+    story = fitz.Story(html)
+    writer = fitz.DocumentWriter(path)
+    page_rect = fitz.paper_rect("letter")
+    content_rect = page_rect + (72, 72, -72, -72)
+    more = True
+    while more:
+        device = writer.begin_page(page_rect)
+        more, _ = story.place(content_rect)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+
+
+def add_outline(path: str, headers: list) -> None:
+    """
+    Adds a top-level outline entry for each header, like LaTeX's hyperref does.
+    """
+    with fitz.open(path) as doc:
+        toc = []
+        for header in headers:
+            page = next(page for page in doc if page.search_for(header))
+            toc.append([1, header, page.number + 1])
+        doc.set_toc(toc)
+        doc.saveIncr()
+
+
+def generate_corpus(
+    num_papers: int, corpus_dir: str = CORPUS_DIR, seed: int = 0
+) -> List[str]:
+    """
+    Writes num_papers synthetic PDFs to corpus_dir, reusing those generated by
+    an earlier run. The same seed always produces the same corpus. Every other
+    paper has an outline, so both ways of finding sections are exercised.
+
+    Returns:
+        List[str]: Paths of the generated PDFs.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = []
+    for index in range(num_papers):
+        name = f"synthetic-v{CORPUS_VERSION}-{seed}-{index:03d}.pdf"
+        path = os.path.join(corpus_dir, name)
+        if not os.path.exists(path):
+            rng = random.Random(f"{seed}-{index}")
+            html, headers = generate_paper(rng, index)
+            write_pdf(html, path)
+            if index % 2 == 0:
+                add_outline(path, headers)
+        paths.append(path)
+    return paths
+
+
+def load_corpus(corpus_dir: str) -> List[str]:
+    """
+    Lists the PDFs of a corpus directory, e.g. real papers downloaded from arXiv.
+    """
+    return sorted(
+        os.path.join(corpus_dir, name)
+        for name in os.listdir(corpus_dir)
+        if name.endswith(".pdf")
+    )
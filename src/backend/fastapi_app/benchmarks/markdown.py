@@ -0,0 +1,116 @@
+"""
+Compares pdf_to_md with the page-parallel pdf_to_md_parallel on long PDFs,
+built by concatenating corpus papers, for several numbers of worker processes.
+
+Run it from the fastapi_app directory, e.g.:
+
+    python -m benchmarks.markdown --pages 20 60 100 --workers 2 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import cycle
+import fitz
+from services.chunker.pdf_parser import (
+    PAGES_PER_SLICE,
+    count_pages,
+    pdf_to_md,
+    pdf_to_md_parallel,
+    split_pages,
+)
+from .corpus import CORPUS_DIR, generate_corpus, load_corpus
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--corpus", help="Directory of PDFs to use instead of the synthetic corpus"
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 60, 100])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--pages-per-slice", type=int, default=PAGES_PER_SLICE)
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+def build_long_pdf(pdf_paths: list, min_pages: int, path: str) -> str:
+    """
+    Concatenates corpus papers until the document has at least min_pages pages.
+    """
+    with fitz.open() as doc:
+        for source in cycle(pdf_paths):
+            if doc.page_count >= min_pages:
+                break
+            with fitz.open(source) as paper:
+                doc.insert_pdf(paper)
+        doc.save(path)
+    return path
+
+
+def timed(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, round(time.perf_counter() - start, 3)
+
+
+def main() -> None:
+    args = parse_args()
+    if args.corpus:
+        pdf_paths = load_corpus(args.corpus)
+    else:
+        pdf_paths = generate_corpus(8, CORPUS_DIR)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        documents = [
+            build_long_pdf(pdf_paths, pages, os.path.join(tmp_dir, f"{pages}.pdf"))
+            for pages in args.pages
+        ]
+        baselines = {path: timed(pdf_to_md, path) for path in documents}
+
+        for workers in args.workers:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            # Start the workers up front so their startup isn't timed
+            list(executor.map(count_pages, documents[:1] * workers))
+            try:
+                for path in documents:
+                    slices = split_pages(count_pages(path), args.pages_per_slice)
+                    md_text, seconds = timed(pdf_to_md_parallel, path, executor, slices)
+                    baseline_md, baseline_seconds = baselines[path]
+                    results.append(
+                        {
+                            "pages": count_pages(path),
+                            "workers": workers,
+                            "single_seconds": baseline_seconds,
+                            "parallel_seconds": seconds,
+                            "speedup": round(baseline_seconds / seconds, 2),
+                            "identical": md_text == baseline_md,
+                        }
+                    )
+            finally:
+                executor.shutdown()
+
+    print(
+        f"{'pages':>5} {'workers':>7} {'single s':>9} {'parallel s':>10}"
+        f" {'speedup':>7} {'identical':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['pages']:>5} {result['workers']:>7}"
+            f" {result['single_seconds']:>9} {result['parallel_seconds']:>10}"
+            f" {result['speedup']:>6}x {str(result['identical']):>9}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
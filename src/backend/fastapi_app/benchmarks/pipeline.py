@@ -0,0 +1,256 @@
+"""
+Offline end-to-end benchmark of the summarization pipeline. PDFs come from a
+local corpus (synthetic by default) and the LLM is the deterministic fake
+backend, so neither arXiv nor OpenAI is reached.
+
+Run it from the fastapi_app directory, e.g.:
+
+    python -m benchmarks.pipeline --cores 1 2 4 --partitions 2 4 8 --latency 0.2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import zipfile
+from uuid import uuid4
+from services.chunker.pdf_parser import md_to_dict, pdf_to_md
+from services.spark import SparkSessionSingleton
+from services.summarizer import SummarizerSingleton, partition_sections
+from services.summarizer.initialize import config
+from .corpus import CORPUS_DIR, generate_corpus, load_corpus
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PY_FILES_DIRS = ["models", "services", "utilities"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--corpus", help="Directory of PDFs to use instead of the synthetic corpus"
+    )
+    parser.add_argument("--papers", type=int, default=8, help="Synthetic papers")
+    parser.add_argument("--cores", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        nargs="+",
+        help="Partition counts to run per core count (default: the core count)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="Seconds per LLM call"
+    )
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument(
+        "--extractive-target",
+        type=int,
+        help="Trim sections to this many tokens before summarizing",
+    )
+    parser.add_argument("--extractive-min-ratio", type=float, default=0.3)
+    parser.add_argument(
+        "--use-redis",
+        action="store_true",
+        help="Keep the LLM cache and rate limiter on (needs REDIS_URL)",
+    )
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+def configure_fake_backend(args: argparse.Namespace) -> None:
+    # The summarizer ships this dict to the executors with each job
+    config["llm"]["backend"] = "fake"
+    config["fake_llm"]["latency"] = args.latency
+    config["fake_llm"]["output_tokens"] = args.output_tokens
+    config["cache"]["llm_responses"] = args.use_redis
+    config["rate_limit"]["enabled"] = args.use_redis
+    config["extractive"]["enabled"] = args.extractive_target is not None
+    if args.extractive_target is not None:
+        config["extractive"]["target_tokens"] = args.extractive_target
+        config["extractive"]["min_ratio"] = args.extractive_min_ratio
+
+
+def build_py_files(zip_path: str) -> str:
+    """
+    Zips the app packages for the Spark workers, like init.sh does in the container.
+    """
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        for directory in PY_FILES_DIRS:
+            for root, _, files in os.walk(os.path.join(APP_DIR, directory)):
+                for name in files:
+                    if name.endswith(".py"):
+                        path = os.path.join(root, name)
+                        archive.write(path, os.path.relpath(path, APP_DIR))
+    return zip_path
+
+
+def describe(durations: list) -> dict:
+    return {
+        "total": round(sum(durations), 3),
+        "mean": round(statistics.mean(durations), 3),
+        "p50": round(statistics.median(durations), 3),
+        "max": round(max(durations), 3),
+    }
+
+
+def benchmark_parsing(pdf_paths: list) -> tuple:
+    """
+    Runs the two stages of pdf_to_json_pipeline on every PDF, timing each one.
+
+    Returns:
+        tuple: The sections of all papers (tagged like batch summaries) and the
+            per-stage timings.
+    """
+    timings = {"pdf_to_md": [], "md_to_dict": []}
+    sections = []
+    for paper, path in enumerate(pdf_paths):
+        start = time.perf_counter()
+        md_text = pdf_to_md(path)
+        timings["pdf_to_md"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        paper_sections = md_to_dict(md_text)
+        timings["md_to_dict"].append(time.perf_counter() - start)
+
+        sections.extend(
+            {**section, "paper": paper, "index": index}
+            for index, section in enumerate(paper_sections)
+        )
+    return sections, {
+        stage: describe(durations) for stage, durations in timings.items()
+    }
+
+
+def benchmark_summarizing(
+    sections: list, cores: int, partition_counts: list, py_files: str
+) -> list:
+    """
+    Summarizes all sections on a local[cores] Spark master once per partition count.
+    """
+    os.environ["SPARK_MASTER"] = f"local[{cores}]"
+    os.environ.setdefault("SPARK_APP_NAME", "ScholarlyBenchmark")
+    os.environ["SPARK_PY_FILES"] = py_files
+
+    spark = SparkSessionSingleton()
+    spark.get_spark_context().setLogLevel("WARN")
+    SummarizerSingleton._instance = None  # its accumulators belong to the old context
+    summarizer = SummarizerSingleton()
+
+    results = []
+    try:
+        for num_partitions in partition_counts:
+            rdd = partition_sections(
+                spark.get_spark_context(), sections, num_partitions
+            )
+            start = time.perf_counter()
+            summaries = summarizer.summarize_chunked_sections(rdd).collect()
+            seconds = time.perf_counter() - start
+            stream_seconds, stream_jobs = benchmark_streaming(summarizer, rdd)
+            results.append(
+                {
+                    "cores": cores,
+                    "partitions": num_partitions,
+                    "sections": len(summaries),
+                    "seconds": round(seconds, 3),
+                    "sections_per_second": round(len(summaries) / seconds, 2),
+                    "stream_seconds": round(stream_seconds, 3),
+                    "stream_jobs_in_group": stream_jobs,
+                    "model_cache": summarizer.get_model_cache_stats(),
+                    "extractive": summarizer.get_extractive_stats(),
+                }
+            )
+            print(
+                f"cores={cores} partitions={num_partitions}: "
+                f"{len(summaries)} sections in {seconds:.2f}s"
+            )
+    finally:
+        spark.close()
+    return results
+
+
+def benchmark_streaming(summarizer: SummarizerSingleton, rdd) -> tuple:
+    """
+    Streams the summaries like the /summarize path does, under a job group.
+
+    Returns:
+        tuple: Seconds taken and the number of Spark jobs that carried the
+            group, which must be one per partition for lease loss to cancel them.
+    """
+    spark_context = rdd.context
+    group = f"benchmark-{uuid4().hex}"
+    spark_context.setJobGroup(group, "Benchmark", interruptOnCancel=True)
+    start = time.perf_counter()
+    try:
+        for _ in summarizer.stream_chunked_sections(rdd):
+            pass
+    finally:
+        spark_context.setLocalProperty("spark.jobGroup.id", None)
+    seconds = time.perf_counter() - start
+
+    jobs = len(spark_context.statusTracker().getJobIdsForGroup(group))
+    if jobs != rdd.getNumPartitions():
+        print(
+            f"Only {jobs} of {rdd.getNumPartitions()} streamed jobs carried the group"
+        )
+    return seconds, jobs
+
+
+def print_report(parse_timings: dict, runs: list) -> None:
+    print("\nParsing (seconds per paper)")
+    for stage, timing in parse_timings.items():
+        print(f"  {stage:<12} " + "  ".join(f"{k}={v}" for k, v in timing.items()))
+
+    print("\nSummarizing")
+    print(
+        f"  {'cores':>5} {'parts':>5} {'seconds':>8} {'sect/s':>8} {'speedup':>8}"
+        f" {'tokens kept':>12}"
+    )
+    baseline = runs[0]["seconds"] if runs else None
+    for run in runs:
+        print(
+            f"  {run['cores']:>5} {run['partitions']:>5} {run['seconds']:>8} "
+            f"{run['sections_per_second']:>8} {baseline / run['seconds']:>7.2f}x"
+            f" {str(run['extractive']['ratio'] or '-'):>12}"
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    configure_fake_backend(args)
+
+    if args.corpus:
+        pdf_paths = load_corpus(args.corpus)
+    else:
+        pdf_paths = generate_corpus(args.papers, CORPUS_DIR)
+    print(f"Parsing {len(pdf_paths)} PDFs...")
+    sections, parse_timings = benchmark_parsing(pdf_paths)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        py_files = build_py_files(os.path.join(tmp_dir, "worker_files.zip"))
+        for cores in args.cores:
+            runs.extend(
+                benchmark_summarizing(
+                    sections, cores, args.partitions or [cores], py_files
+                )
+            )
+
+    print_report(parse_timings, runs)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "papers": len(pdf_paths),
+                    "sections": len(sections),
+                    "llm": config["fake_llm"],
+                    "parsing": parse_timings,
+                    "summarizing": runs,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
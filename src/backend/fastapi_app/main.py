@@ -9,19 +9,26 @@ from io import BytesIO
 from fastapi.responses import StreamingResponse
 
 # Local application imports
-from routes import query
+from routes import query, jobs
 from services import *
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # On startup
+    await HttpClientSingleton().initialize()
     await RedisSingleton().initialize()
+    PdfStoreSingleton().initialize()
+    ChunkerSingleton().start()
+    PrefetchSingleton().start()
     SparkSessionSingleton()
     SummarizerSingleton()
     yield
     # On shutdown
+    await PrefetchSingleton().close()
+    await HttpClientSingleton().close()
     await RedisSingleton().close()
+    ChunkerSingleton().close()
     SparkSessionSingleton().close()
 
 
@@ -38,6 +45,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(query, prefix="/query")
+app.include_router(jobs, prefix="/jobs")
 
 
 @app.get("/")
@@ -45,6 +53,24 @@ def read_root():
     return "Hello, World!"
 
 
+@app.get("/stats")
+async def stats():
+    """
+    Reports cache counters so hit rates can be monitored
+    """
+    return {
+        "arxiv_cache": await RedisSingleton().get_arxiv_cache_stats(),
+        "pdf_store": PdfStoreSingleton().stats(),
+        "chunk_cache": await RedisSingleton().get_chunk_cache_stats(),
+        "paper_cache": RedisSingleton().get_paper_cache_stats(),
+        "model_cache": SummarizerSingleton().get_model_cache_stats(),
+        "extractive": SummarizerSingleton().get_extractive_stats(),
+        "llm_cache": await RedisSingleton().get_llm_cache_stats(),
+        "llm_rate_limit": await RedisSingleton().get_rate_limit_stats(),
+        "prefetch": PrefetchSingleton().get_stats(),
+    }
+
+
 # Since these requests doesn't come with any anything
 # we use experimental pdf links below
 # pdf_links = [
@@ -57,15 +83,15 @@ def read_root():
 @app.get("/test_chunk")
 async def test_chunk():
     param = {"pdf_link": "http://arxiv.org/pdf/2411.02973.pdf"}
-    pdf_bytes = await fetch_single_pdf(param["pdf_link"])
-    return ChunkerSingleton().chunk_pdf(pdf_bytes)
+    async with pinned_pdf(param["pdf_link"]) as pdf_path:
+        return await ChunkerSingleton().chunk_pdf_cached(pdf_path)
 
 
 @app.get("/test_summary")
 async def test_summary():
     param = {"pdf_link": "http://arxiv.org/pdf/2411.02973.pdf"}
-    pdf_bytes = await fetch_single_pdf(param["pdf_link"])
-    chunked_pdf = ChunkerSingleton().chunk_pdf(pdf_bytes)
+    async with pinned_pdf(param["pdf_link"]) as pdf_path:
+        chunked_pdf = await ChunkerSingleton().chunk_pdf_cached(pdf_path)
 
     chunked_pdf_rdd = (
         SparkSessionSingleton().get_spark_context().parallelize(chunked_pdf)
@@ -95,3 +95,18 @@ class SummarizeParams(BaseModel):
 
     def get_pdf_link(self) -> dict:
         return self.pdf_link
+
+
+class BatchSummarizeParams(BaseModel):
+    pdf_links: list[str] = Field(min_length=1, max_length=50)  # links or arXiv ids
+
+    @field_validator("pdf_links", mode="before")
+    def clean_fields(cls, value):
+        # Strip whitespace from every link and drop empty ones
+        if isinstance(value, list):
+            value = [link.strip() if isinstance(link, str) else link for link in value]
+            value = [link for link in value if link != ""]
+        return value
+
+    def get_pdf_links(self) -> list:
+        return self.pdf_links
@@ -1 +1,2 @@
-from .query import router as query
\ No newline at end of file
+from .query import router as query
+from .jobs import router as jobs
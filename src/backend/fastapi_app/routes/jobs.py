@@ -0,0 +1,63 @@
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal
+import json
+from models.query import SummarizeParams
+from services import *
+
+router = APIRouter()
+
+
+@router.post("")
+async def submit_job(
+    params: Annotated[SummarizeParams, Query()], background_tasks: BackgroundTasks
+) -> dict:
+    """
+    Submits a PDF for summarization and returns immediately
+
+    Args:
+        pdf_link (str, required): link to the PDF to summarize
+
+    Returns:
+        dict: the id of the job to poll or stream events from
+    """
+    pdf_link = params.get_pdf_link()
+    job_id = await submit_summary_job(pdf_link)
+    background_tasks.add_task(run_summary_job, job_id, pdf_link)
+    return {"job_id": job_id}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str) -> dict:
+    """
+    Returns the status, current stage and (once completed) summary of a job
+    """
+    job = await RedisSingleton().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail={"error": "Job not found."})
+    return job
+
+
+@router.get("/{job_id}/events")
+async def get_job_events(
+    job_id: str, format: Literal["sse", "ndjson"] = "sse"
+) -> StreamingResponse:
+    """
+    Streams the events of a job (queued, downloaded, chunked, section_summarized,
+    completed/failed) from the beginning, as server-sent events or NDJSON
+    """
+    if await RedisSingleton().get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail={"error": "Job not found."})
+
+    async def stream():
+        async for event in iter_job_events(job_id):
+            if format == "ndjson":
+                if event is not None:
+                    yield json.dumps(event) + "\n"
+            elif event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
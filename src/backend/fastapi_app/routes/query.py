@@ -1,7 +1,14 @@
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from typing import Annotated
 import asyncio
-from models.query import QueryParams, AdvancedQueryParams, SummarizeParams
+import json
+from models.query import (
+    QueryParams,
+    AdvancedQueryParams,
+    SummarizeParams,
+    BatchSummarizeParams,
+)
 from services import *
 from services import arxiv
 from utilities import log, log_async
@@ -9,6 +16,9 @@ from pprint import pprint
 
 router = APIRouter()
 
+# Keep references to summaries that outlive a disconnected streaming client
+_summary_tasks = set()
+
 
 @router.get("")
 async def query(params: Annotated[QueryParams, Query()]) -> dict:
@@ -29,7 +39,7 @@ async def query(params: Annotated[QueryParams, Query()]) -> dict:
     # Fetch data from arXiv API
     async with log_async("Fetching data from arXiv API"):
         arxiv_params = params.to_arxiv()
-        arxiv_response = await arxiv.fetch(**arxiv_params)
+        arxiv_response = await arxiv.fetch_cached(**arxiv_params)
 
     # pprint(arxiv_response)
     # Extract entries and respective PDF links
@@ -58,6 +68,8 @@ async def query(params: Annotated[QueryParams, Query()]) -> dict:
         }
         for entry, pdf_link in zip(entries, pdf_links)
     ]
+    # Warm the PDF and chunk caches for the results users usually summarize next
+    PrefetchSingleton().enqueue(pdf_links)
     totalResults = arxiv_response["feed"]["opensearch:totalResults"]["#text"]
     # print(totalResults, flush=True)
 
@@ -85,7 +97,7 @@ async def query_advanced(params: Annotated[AdvancedQueryParams, Query()]) -> dic
     # Fetch data from arXiv API
     async with log_async("Fetching data from arXiv API"):
         arxiv_params = params.to_arxiv()
-        arxiv_response = await arxiv.fetch(**arxiv_params)
+        arxiv_response = await arxiv.fetch_cached(**arxiv_params)
 
     # Extract entries and respective PDF links
     entries = []
@@ -114,6 +126,8 @@ async def query_advanced(params: Annotated[AdvancedQueryParams, Query()]) -> dic
         }
         for entry, pdf_link in zip(entries, pdf_links)
     ]
+    # Warm the PDF and chunk caches for the results users usually summarize next
+    PrefetchSingleton().enqueue(pdf_links)
     totalResults = arxiv_response["feed"]["opensearch:totalResults"]["#text"]
 
     return {"arxiv": arxiv_data, "totalResults": totalResults}
@@ -122,43 +136,77 @@ async def query_advanced(params: Annotated[AdvancedQueryParams, Query()]) -> dic
 @router.get("/summarize")
 async def summarize(params: Annotated[SummarizeParams, Query()]) -> dict:
     pdf_link = params.get_pdf_link()
+    try:
+        return {"summary": await get_or_create_summary(pdf_link)}
+    except Exception as e:
+        return {"summary": "Error", "error": str(e)}
 
-    rd = RedisSingleton()
-    status: ProcessStatus = await rd.get_pdf_process_status(pdf_link)
-
-    if status is not None:
-        delay = 1
-        while status != ProcessStatus.COMPLETED and delay <= 240:
-            await asyncio.sleep(delay)
-            status = await rd.get_pdf_process_status(pdf_link)
-            delay *= 2
-        if status == ProcessStatus.COMPLETED:
-            await rd.store_pdf_process_status(pdf_link, ProcessStatus.COMPLETED)
-            return {"summary": await rd.get_pdf_summary(pdf_link)}
 
-    try:
-        await rd.store_pdf_process_status(pdf_link, ProcessStatus.PROCCESSING)
-        async with log_async("Fetching PDF from arXiv"):
-            pdf_bytes = await fetch_single_pdf(pdf_link)
+@router.get("/summarize/stream")
+async def summarize_stream(
+    params: Annotated[SummarizeParams, Query()],
+) -> StreamingResponse:
+    """
+    Same as /summarize, but streams each section as NDJSON ({"index", "header",
+    "summary"}) as soon as it is summarized instead of waiting for the whole paper.
+    Cached summaries are streamed at once. The combined summary is still cached.
+    """
+    pdf_link = params.get_pdf_link()
+    sections = asyncio.Queue()
+
+    async def on_event(event: str, data: dict) -> None:
+        if event == "section_summarized":
+            await sections.put(dict(data))
+
+    # Run independently of the response so a disconnect doesn't cancel it
+    task = asyncio.create_task(get_or_create_summary(pdf_link, on_event))
+    _summary_tasks.add(task)
+    task.add_done_callback(_summary_tasks.discard)
+
+    async def stream():
+        streamed = set()
+        while not (task.done() and sections.empty()):
+            get_section = asyncio.create_task(sections.get())
+            await asyncio.wait({get_section, task}, return_when=asyncio.FIRST_COMPLETED)
+            if not get_section.done():
+                get_section.cancel()
+                continue
+            section = get_section.result()
+            streamed.add(section["index"])
+            yield json.dumps(section) + "\n"
+
+        try:
+            summary = task.result()
+        except Exception as e:
+            yield json.dumps({"summary": "Error", "error": str(e)}) + "\n"
+            return
+        # Sections that weren't produced by this request (e.g. cached)
+        for index, section in enumerate(summary):
+            if index not in streamed:
+                yield json.dumps({"index": index, **section}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/summarize/batch")
+async def summarize_batch(params: BatchSummarizeParams) -> dict:
+    """
+    Summarizes several papers in one Spark job
 
-        with log("Chunking PDF into sections"):
-            chunked_pdf = ChunkerSingleton().chunk_pdf(pdf_bytes)
+    Args:
+        pdf_links (list[str], required): PDF links or arXiv ids (at most 50)
 
-        with log("Summarizing each chunk"):
-            chunked_pdf_rdd = (
-                SparkSessionSingleton().get_spark_context().parallelize(chunked_pdf)
-            )
-            summary = (
-                SummarizerSingleton()
-                .summarize_chunked_sections(chunked_pdf_rdd)
-                .collect()
+    Returns:
+        dict: a summary (or error) per paper, in the order given
+    """
+    results = await summarize_pdfs(params.get_pdf_links())
+    return {
+        "summaries": [
+            (
+                {"pdf_link": pdf_link, "summary": "Error", "error": str(result)}
+                if isinstance(result, Exception)
+                else {"pdf_link": pdf_link, "summary": result}
             )
-
-        await rd.store_pdf_process_status(pdf_link, ProcessStatus.COMPLETED)
-        await rd.store_pdf_summary(pdf_link, summary)
-        return {"summary": summary}
-    except Exception as e:
-        status = await rd.get_pdf_process_status(pdf_link)
-        if not status or status != ProcessStatus.COMPLETED:
-            await rd.store_pdf_process_status(pdf_link, ProcessStatus.FAILED)
-        return {"summary": "Error", "error": str(e)}
+            for pdf_link, result in results.items()
+        ]
+    }
@@ -1,14 +1,27 @@
 from .spark import *
+from .http import *
 from .redis import *
 from .summarizer import *
 from .chunker import *
 from .pdf import *
+from .pipeline import *
 
 __all__ = [
+    "HttpClientSingleton",
     "RedisSingleton",
     "ProcessStatus",
     "SparkSessionSingleton",
     "SummarizerSingleton",
     "ChunkerSingleton",
     "fetch_single_pdf",
+    "fetch_cached_pdf",
+    "pinned_pdf",
+    "PdfStoreSingleton",
+    "summarize_pdf",
+    "get_or_create_summary",
+    "summarize_pdfs",
+    "PrefetchSingleton",
+    "submit_summary_job",
+    "run_summary_job",
+    "iter_job_events",
 ]
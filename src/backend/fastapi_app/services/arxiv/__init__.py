@@ -1 +1,2 @@
-from .fetch import fetch
\ No newline at end of file
+from .fetch import fetch
+from .cache import fetch_cached
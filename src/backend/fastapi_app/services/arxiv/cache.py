@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from services.redis import RedisSingleton
+from .fetch import fetch
+
+ARXIV_CACHE_TTL = int(os.getenv("ARXIV_CACHE_TTL", 300))  # seconds an entry is fresh
+ARXIV_CACHE_STALE_TTL = int(
+    os.getenv("ARXIV_CACHE_STALE_TTL", 3600)
+)  # extra seconds a stale entry may still be served while it is refreshed
+
+# Keep references to in-flight refreshes so they aren't garbage collected
+_refresh_tasks = set()
+
+
+def normalize_query(query_fields: dict, query_config: dict) -> str:
+    """
+    Builds a stable cache key from the output of BaseQueryParams.to_arxiv.
+
+    Args:
+        query_fields (dict): Field/keyword pairs of the query.
+        query_config (dict): Pagination, sorting and boolean operator settings.
+
+    Returns:
+        str: Hex digest identifying the query.
+    """
+    fields = {
+        key: " ".join(str(value).lower().split())  # arXiv search is case-insensitive
+        for key, value in query_fields.items()
+        if value is not None
+    }
+    config = {key: value for key, value in query_config.items() if value is not None}
+    payload = json.dumps({"fields": fields, "config": config}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _refresh(query_key: str, query_fields: dict, query_config: dict) -> dict:
+    rd = RedisSingleton()
+    # fetch() pops keys from its arguments, so hand it copies
+    data = await fetch(dict(query_fields), dict(query_config))
+    await rd.store_arxiv_result(
+        query_key,
+        {"stored_at": time.time(), "data": data},
+        ex=ARXIV_CACHE_TTL + ARXIV_CACHE_STALE_TTL,
+    )
+    return data
+
+
+async def _refresh_in_background(
+    query_key: str, query_fields: dict, query_config: dict
+) -> None:
+    rd = RedisSingleton()
+    if not await rd.acquire_arxiv_refresh(query_key, ex=ARXIV_CACHE_TTL):
+        return
+    try:
+        await _refresh(query_key, query_fields, query_config)
+    except Exception as e:
+        print(f"Background refresh of arXiv query {query_key} failed: {e}")
+    finally:
+        await rd.release_arxiv_refresh(query_key)
+
+
+async def fetch_cached(query_fields: dict, query_config: dict) -> dict:
+    """
+    Cached counterpart of arxiv.fetch using stale-while-revalidate: fresh entries
+    are served directly, stale entries are served while a background task fetches
+    a new copy, and misses go to the arXiv API.
+    """
+    rd = RedisSingleton()
+    query_key = normalize_query(query_fields, query_config)
+    entry = await rd.get_arxiv_result(query_key)
+
+    if entry is None:
+        await rd.incr_arxiv_cache_stat("misses")
+        return await _refresh(query_key, query_fields, query_config)
+
+    if time.time() - entry["stored_at"] > ARXIV_CACHE_TTL:
+        await rd.incr_arxiv_cache_stat("stale_hits")
+        task = asyncio.create_task(
+            _refresh_in_background(query_key, dict(query_fields), dict(query_config))
+        )
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+    else:
+        await rd.incr_arxiv_cache_stat("hits")
+    return entry["data"]
@@ -1,6 +1,6 @@
 from fastapi import HTTPException
-import aiohttp
 import xmltodict
+from services.http import HttpClientSingleton
 
 
 async def fetch(query_fields: dict, query_config: dict) -> dict:
@@ -30,18 +30,18 @@ async def fetch(query_fields: dict, query_config: dict) -> dict:
     # Construct full URL for arXiv API request
     url = f"{base_url}?{query_string}"
 
-    # Make asynchronous HTTP GET request to arXiv API
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status != 200:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail={
-                        "error": "Failed to fetch data from arXiv API.",
-                        "instance": url,
-                    },
-                )
-            xml_response = await response.text()
+    # Make asynchronous HTTP GET request to arXiv API over the shared session
+    session = await HttpClientSingleton().get_session()
+    async with session.get(url) as response:
+        if response.status != 200:
+            raise HTTPException(
+                status_code=response.status,
+                detail={
+                    "error": "Failed to fetch data from arXiv API.",
+                    "instance": url,
+                },
+            )
+        xml_response = await response.text()
 
     # Parse XML response into JSON
     data = xmltodict.parse(xml_response)
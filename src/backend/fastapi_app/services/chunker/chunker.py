@@ -1,19 +1,267 @@
 from services.spark import *
 from services.redis import *
 from .pdf_parser import *
+from .outline_parser import OUTLINE_PARSER_VERSION, outline_to_dict
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+import asyncio
+import hashlib
+import multiprocessing
+import mmap
+import os
 import fitz
 
 
+def hash_pdf(pdf: bytes | str) -> str:
+    """
+    Returns the SHA-256 digest of a PDF given as bytes or as a path. Files are
+    memory-mapped so that hashing doesn't read them into memory.
+    """
+    if not isinstance(pdf, str):
+        return hashlib.sha256(pdf).hexdigest()
+    with open(pdf, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return hashlib.sha256(mm).hexdigest()
+
+
+def chunk_pdf_in_worker(pdf: bytes | str):
+    # Entry point for the process pool, which can only run module-level functions
+    return ChunkerSingleton().chunk_pdf(pdf)
+
+
+def outline_in_worker(pdf_path: str):
+    with fitz.open(pdf_path) as doc:
+        return outline_to_dict(doc)
+
+
 class ChunkerSingleton:
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ChunkerSingleton, cls).__new__(cls)
+            cls._instance.executor = None
+            cls._instance.timeout = float(os.getenv("CHUNKER_TIMEOUT", 300))
+            # "outline" tries the fast outline/font path before the Markdown one
+            cls._instance.engine = os.getenv("CHUNKER_ENGINE", "outline")
+            # Longer PDFs are converted to Markdown by all workers, a slice each
+            cls._instance.parallel_min_pages = int(
+                os.getenv("CHUNKER_PARALLEL_MIN_PAGES", 30)
+            )
+            # Smaller slices stream the first sections sooner but cost more IPC
+            cls._instance.pages_per_slice = int(
+                os.getenv("CHUNKER_PAGES_PER_SLICE", PAGES_PER_SLICE)
+            )
+            cls._instance.workers = 1
         return cls._instance
 
-    def chunk_pdf(self, pdf_bytes: any):
-        pdf = BytesIO(pdf_bytes)
-        pdf = fitz.open(stream=pdf, filetype="pdf")
+    def start(self) -> None:
+        """
+        Starts the process pool that parses PDFs off the event loop.
+        """
+        if self.executor is None:
+            self.workers = int(os.getenv("CHUNKER_WORKERS", os.cpu_count() or 1))
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # Don't fork the server process, which holds the Spark gateway
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def restart(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Kills the workers of executor, which may be stuck on a pathological PDF
+        since timing out a job doesn't stop it, and starts a fresh pool. Other
+        jobs still running on the old pool fail with BrokenProcessPool.
+        Does nothing if the pool was already replaced, e.g. by another timeout.
+        """
+        if executor is None or executor is not self.executor:
+            return
+        processes = list((executor._processes or {}).values())
+        self.close()
+        for process in processes:
+            process.terminate()
+        self.start()
+
+    async def wait_for(self, job, timeout: float):
+        """
+        Awaits a job on the process pool, restarting the pool if it times out.
+
+        Raises:
+            TimeoutError: If the job takes longer than timeout seconds.
+        """
+        executor = self.executor
+        try:
+            return await asyncio.wait_for(job, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.restart(executor)
+            raise
+
+    def chunk_pdf(self, pdf: bytes | str):
+        if isinstance(pdf, str):
+            # Let MuPDF read the stored file directly instead of copying its bytes
+            pdf = fitz.open(pdf, filetype="pdf")
+        else:
+            pdf = fitz.open(stream=BytesIO(pdf), filetype="pdf")
+        if self.engine == "outline":
+            sections = outline_to_dict(pdf)
+            if sections is not None:
+                return sections
         return pdf_to_json_pipeline(pdf)
+
+    def page_slices(self, page_count: int) -> list:
+        """
+        Decides how the pages of a PDF are split into jobs, for both the
+        streaming and the batch paths. PDFs shorter than
+        CHUNKER_PARALLEL_MIN_PAGES, or without several workers to spread them
+        over, are a single slice, parsed by one worker like chunk_pdf. Longer
+        ones are split into slices of CHUNKER_PAGES_PER_SLICE pages.
+        """
+        if (
+            self.executor is None
+            or self.workers < 2
+            or page_count < self.parallel_min_pages
+        ):
+            return [list(range(page_count))]
+        return split_pages(page_count, self.pages_per_slice)
+
+    def parser_version(self) -> str:
+        # Chunks cached by one engine aren't reused by the other
+        if self.engine == "outline":
+            return f"outline{OUTLINE_PARSER_VERSION}-{PARSER_VERSION}"
+        return PARSER_VERSION
+
+    async def chunk_pdf_cached(self, pdf: bytes | str):
+        """
+        Same as chunk_pdf, but reuses sections previously parsed from identical PDF
+        content by the same engine and parser version.
+        """
+        rd = RedisSingleton()
+        pdf_hash = await asyncio.to_thread(hash_pdf, pdf)
+        chunks = await rd.get_pdf_chunks(pdf_hash, self.parser_version())
+        if chunks is None:
+            chunks = await self.chunk_pdf_async(pdf)
+            await rd.store_pdf_chunks(pdf_hash, self.parser_version(), chunks)
+        return chunks
+
+    async def iter_pdf_sections_cached(self, pdf_path: str):
+        """
+        Same as chunk_pdf_cached, but yields each section as soon as it's parsed
+        (see iter_pdf_sections) so that it can be summarized while later pages
+        are still being parsed.
+        """
+        rd = RedisSingleton()
+        pdf_hash = await asyncio.to_thread(hash_pdf, pdf_path)
+        chunks = await rd.get_pdf_chunks(pdf_hash, self.parser_version())
+        if chunks is not None:
+            for section in chunks:
+                yield section
+            return
+
+        chunks = []
+        async for section in self.iter_pdf_sections(pdf_path):
+            chunks.append(section)
+            yield section
+        await rd.store_pdf_chunks(pdf_hash, self.parser_version(), chunks)
+
+    async def iter_pdf_sections(self, pdf_path: str):
+        """
+        Yields the sections of a stored PDF as they're parsed. PDFs that need the
+        Markdown pipeline and are split into several slices (see page_slices)
+        are converted and partitioned slice by slice by the process pool, and
+        each section is yielded as soon as the next valid header closes it.
+        Otherwise the sections are yielded once all are parsed.
+
+        Raises:
+            TimeoutError: If parsing takes longer than CHUNKER_TIMEOUT seconds.
+        """
+        if self.executor is None:
+            for section in await self.chunk_pdf_async(pdf_path):
+                yield section
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+
+        def submit(function, *args) -> asyncio.Future:
+            return loop.run_in_executor(self.executor, function, *args)
+
+        async def result(job: asyncio.Future):
+            return await self.wait_for(job, deadline - loop.time())
+
+        slices = self.page_slices(await asyncio.to_thread(count_pages, pdf_path))
+        if len(slices) == 1:
+            for section in await result(submit(chunk_pdf_in_worker, pdf_path)):
+                yield section
+            return
+
+        if self.engine == "outline":
+            sections = await result(submit(outline_in_worker, pdf_path))
+            if sections is not None:
+                for section in sections:
+                    yield section
+                return
+
+        hdr_info = await result(submit(identify_headers, pdf_path))
+        # Submit all slices at once; the pool works through them in page order
+        jobs = [
+            submit(pdf_pages_to_elements, pdf_path, pages, hdr_info) for pages in slices
+        ]
+        builder = SectionBuilder()
+        try:
+            for job in jobs:
+                for element in await result(job):
+                    for section in builder.add(element):
+                        yield section
+        finally:
+            for job in jobs:
+                job.cancel()
+        for section in builder.finish():
+            yield section
+
+    async def chunk_pdf_async(self, pdf: bytes | str):
+        """
+        Runs chunk_pdf in the process pool (or a thread if the pool isn't started)
+        so the event loop keeps serving other requests while a PDF is parsed.
+        Pass a path rather than bytes to avoid pickling the PDF to the worker.
+
+        Raises:
+            TimeoutError: If parsing takes longer than CHUNKER_TIMEOUT seconds. The
+                process pool is then restarted to stop the stuck workers.
+        """
+        if self.executor is None:
+            job = asyncio.to_thread(self.chunk_pdf, pdf)
+        elif isinstance(pdf, str) and self.workers > 1:
+            job = self.chunk_pdf_parallel(pdf)
+        else:
+            loop = asyncio.get_running_loop()
+            job = loop.run_in_executor(self.executor, chunk_pdf_in_worker, pdf)
+        return await self.wait_for(job, self.timeout)
+
+    async def chunk_pdf_parallel(self, pdf_path: str):
+        """
+        Same as chunk_pdf, but a PDF split into several slices (see page_slices)
+        that needs the Markdown pipeline is converted by all workers in parallel,
+        each opening the file and converting its own slice of pages. Other PDFs
+        are parsed by a single worker.
+        """
+        loop = asyncio.get_running_loop()
+        slices = self.page_slices(await asyncio.to_thread(count_pages, pdf_path))
+        if len(slices) == 1:
+            return await loop.run_in_executor(
+                self.executor, chunk_pdf_in_worker, pdf_path
+            )
+
+        if self.engine == "outline":
+            sections = await loop.run_in_executor(
+                self.executor, outline_in_worker, pdf_path
+            )
+            if sections is not None:
+                return sections
+        md_text = await asyncio.to_thread(
+            pdf_to_md_parallel, pdf_path, self.executor, slices
+        )
+        return await loop.run_in_executor(self.executor, md_to_dict, md_text)
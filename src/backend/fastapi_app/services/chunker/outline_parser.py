@@ -0,0 +1,168 @@
+from collections import Counter
+from typing import Dict, List, Optional
+import fitz
+from .section_checker import HEADER_REGEX, is_valid_header
+
+# Bump whenever a change alters the sections produced for the same PDF
+OUTLINE_PARSER_VERSION = "2"
+
+HEADING_SIZE_RATIO = 1.15  # Font size of a heading relative to the body text
+MAX_HEADING_LENGTH = 100
+MIN_SECTIONS = 2  # Fewer than this means no usable structure was found
+REFERENCE_HEADERS = ("REFERENCE", "BIBLIOGRAPHY")
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def extract_lines(doc: fitz.Document) -> List[Dict]:
+    """
+    Collects every text line of the document with its page, font size and
+    boldness, in reading order.
+    """
+    lines = []
+    for page in doc:
+        text_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+        for block in text_dict["blocks"]:
+            for line in block.get("lines", []):
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                lines.append(
+                    {
+                        "page": page.number,
+                        "text": " ".join(span["text"].strip() for span in spans),
+                        "size": round(max(span["size"] for span in spans), 1),
+                        "bold": all(
+                            span["flags"] & fitz.TEXT_FONT_BOLD for span in spans
+                        ),
+                    }
+                )
+    return lines
+
+
+def body_font_size(lines: List[Dict]) -> float:
+    # The size used for most characters is the body text
+    sizes = Counter()
+    for line in lines:
+        sizes[line["size"]] += len(line["text"])
+    return sizes.most_common(1)[0][0]
+
+
+def is_reference_header(text: str) -> bool:
+    return text.upper().lstrip("0123456789. ").startswith(REFERENCE_HEADERS)
+
+
+def find_outline_headings(doc: fitz.Document, lines: List[Dict]) -> List[int]:
+    """
+    Locates the top-level entries of the PDF outline among the text lines.
+
+    Returns:
+        List[int]: Indices of the heading lines, in reading order.
+    """
+    entries = [
+        (title, page) for level, title, page in doc.get_toc(simple=True) if level == 1
+    ]
+    # Like the Markdown path, keep only numbered sections when the outline has any
+    if any(HEADER_REGEX.match(title.strip()) for title, _ in entries):
+        entries = [
+            (title, page)
+            for title, page in entries
+            if HEADER_REGEX.match(title.strip()) or is_reference_header(title)
+        ]
+
+    headings = []
+    position = 0
+    for title, page in entries:
+        title = normalize(title)
+        if not title:
+            continue
+        for i in range(position, len(lines)):
+            # Outline pages are 1-based, and -1 when the target is unknown
+            if lines[i]["page"] < page - 1:
+                continue
+            text = normalize(lines[i]["text"])
+            if len(text) > MAX_HEADING_LENGTH:
+                continue
+            # Long headings wrap, so the line may hold only the start of the title
+            if text.startswith(title) or (len(text) > 3 and title.startswith(text)):
+                headings.append(i)
+                position = i + 1
+                break
+    return headings
+
+
+def find_font_headings(lines: List[Dict]) -> List[int]:
+    """
+    Finds numbered section headings set larger (or bolder) than the body text.
+
+    Returns:
+        List[int]: Indices of the heading lines, in reading order.
+    """
+    body_size = body_font_size(lines)
+    headings = []
+    current_title = None
+    for i, line in enumerate(lines):
+        text = line["text"]
+        if len(text) > MAX_HEADING_LENGTH:
+            continue
+        if line["size"] < body_size * HEADING_SIZE_RATIO and not (
+            line["bold"] and line["size"] >= body_size
+        ):
+            continue
+        if is_reference_header(text):
+            # Sections end at the references, see build_sections
+            headings.append(i)
+            break
+        if is_valid_header(text, current_title):
+            headings.append(i)
+            current_title = text
+    return headings
+
+
+def build_sections(
+    lines: List[Dict], headings: List[int], include_ref: bool
+) -> List[Dict[str, str]]:
+    sections = []
+    boundaries = headings + [len(lines)]
+    for start, end in zip(boundaries, boundaries[1:]):
+        header = lines[start]["text"]
+        if is_reference_header(header) and not include_ref:
+            break
+        text = " ".join(line["text"] for line in lines[start + 1 : end])
+        sections.append({"header": header, "text": text})
+    return sections
+
+
+def outline_to_dict(
+    doc: fitz.Document, include_ref=False
+) -> Optional[List[Dict[str, str]]]:
+    """
+    Splits a PDF into sections straight from its outline, or from the font
+    sizes of its headings when it has no usable outline. Much faster than
+    pdf_to_json_pipeline, which renders and re-parses Markdown.
+
+    Args:
+        doc (fitz.Document): The opened PDF.
+        include_ref (bool, optional): Whether to include the reference section. Defaults to False.
+
+    Returns:
+        Optional[List[Dict[str, str]]]: Sections with headers and content, in
+            the same format as md_to_dict, or None if no usable structure was
+            found or the PDF couldn't be parsed.
+    """
+    try:
+        lines = extract_lines(doc)
+        if not lines:
+            return None
+
+        headings = find_outline_headings(doc, lines)
+        sections = build_sections(lines, headings, include_ref)
+        if len(sections) < MIN_SECTIONS:
+            sections = build_sections(lines, find_font_headings(lines), include_ref)
+    except Exception as e:
+        # Leave the PDF to the Markdown pipeline
+        print(f"Failed to parse the PDF outline: {e}")
+        return None
+    return sections if len(sections) >= MIN_SECTIONS else None
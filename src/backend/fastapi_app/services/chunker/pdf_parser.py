@@ -2,11 +2,21 @@ import pymupdf4llm
 from unstructured.partition.md import partition_md
 from unstructured.chunking.basic import chunk_elements
 import json
+import math
 import sys
-from typing import List, Dict
+from concurrent.futures import Executor
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List
+import fitz
 from .section_checker import is_valid_header
 from pprint import pprint
 
+# Bump whenever a change alters the sections produced for the same PDF, so that
+# cached chunks from the previous parser are no longer used
+PARSER_VERSION = "1"
+
+PAGES_PER_SLICE = 10  # Smaller slices cost more in process overhead than they save
+
 
 def pdf_parser():
     if len(sys.argv) < 2:
@@ -61,61 +71,211 @@ def pdf_to_md(pdf_path: str, save_md=False) -> str:
     return md_text
 
 
-def md_to_dict(md_text: str, include_ref=False) -> List[Dict[str, str]]:
+def count_pages(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def identify_headers(pdf_path: str) -> pymupdf4llm.IdentifyHeaders:
     """
-    Converts markdown text into a list of sections with headers and content.
+    Maps the font sizes of a PDF to Markdown header levels, once for the whole
+    document so that every page slice renders headers the same way.
+    """
+    return pymupdf4llm.IdentifyHeaders(pdf_path)
+
+
+def pdf_pages_to_md(
+    pdf_path: str, pages: List[int], hdr_info: pymupdf4llm.IdentifyHeaders = None
+) -> str:
+    """
+    Converts some pages of a PDF file to markdown text. The file is opened here,
+    so this can run in a worker process without the document being pickled.
 
     Args:
-        md_text (str): Markdown content to parse.
-        include_ref (bool, optional): Whether to include the reference section. Defaults to False.
+        pdf_path (str): Path to the input PDF file.
+        pages (List[int]): 0-based numbers of the pages to convert.
+        hdr_info (IdentifyHeaders, optional): Header levels of the whole document.
 
     Returns:
-        List[Dict[str, str]]: A list of sections with headers and content.
+        str: Markdown content extracted from the pages.
     """
-    elements = partition_md(text=md_text)
-    current_title = None
-    current_text = []
-    section_list = []
-    
-    # Chunking by section headers
-    for element in elements:
+    with fitz.open(pdf_path) as doc:
+        return pymupdf4llm.to_markdown(
+            doc, pages=pages, hdr_info=hdr_info, show_progress=False
+        )
+
+
+def split_pages(page_count: int, pages_per_slice: int) -> List[List[int]]:
+    """
+    Splits the pages of a document into contiguous slices of similar size and
+    at most pages_per_slice pages.
+    """
+    num_slices = max(1, math.ceil(page_count / pages_per_slice))
+    bounds = [math.ceil(i * page_count / num_slices) for i in range(num_slices + 1)]
+    return [list(range(start, end)) for start, end in zip(bounds, bounds[1:])]
+
+
+def pdf_to_md_parallel(
+    pdf_path: str, executor: Executor, slices: List[List[int]]
+) -> str:
+    """
+    Converts a PDF file to markdown text like pdf_to_md, but in slices of pages
+    converted in parallel by the executor's workers, then stitched back together
+    in page order. The result is identical to pdf_to_md.
+
+    Args:
+        pdf_path (str): Path to the input PDF file.
+        executor (Executor): Pool of worker processes.
+        slices (List[List[int]]): Contiguous slices covering every page in
+            order, e.g. from split_pages.
+
+    Returns:
+        str: Markdown content extracted from the PDF.
+    """
+    if len(slices) == 1:
+        return executor.submit(pdf_pages_to_md, pdf_path, slices[0]).result()
+
+    hdr_info = executor.submit(identify_headers, pdf_path).result()
+    return "".join(
+        executor.map(pdf_pages_to_md, repeat(pdf_path), slices, repeat(hdr_info))
+    )
+
+
+class SectionBuilder:
+    """
+    Groups parsed markdown elements into sections as they come in, so that each
+    section is available as soon as the next valid header closes it. The first
+    section is held back until a second one is found, since documents with at
+    most one section are chunked by character count instead.
+
+    Args:
+        include_ref (bool, optional): Whether to include the reference section. Defaults to False.
+    """
+
+    def __init__(self, include_ref=False):
+        self.include_ref = include_ref
+        self.current_title = None
+        self.current_text = []
+        self.num_sections = 0
+        self.held_sections = []
+        self.elements = []  # Kept only while the fallback may still be needed
+        self.reached_references = False
+
+    def add(self, element) -> List[Dict[str, str]]:
+        """
+        Adds the next element of the document.
+
+        Returns:
+            List[Dict[str, str]]: The sections this element completed, if any.
+        """
+        if self.elements is not None:
+            self.elements.append(element)
+        if self.reached_references:
+            return []
+
         element_str = str(element)
         # check for element marked as title/header and set as current title if valid
         if element.category in ["Title", "Header"] and "http" not in element_str:
             # terminate when the header name starts with reference
-            if element_str.upper().startswith("REFERENCE") and not include_ref:
-                break
-            valid_header = is_valid_header(element_str, current_title)
+            if element_str.upper().startswith("REFERENCE") and not self.include_ref:
+                self.reached_references = True
+                return []
+            valid_header = is_valid_header(element_str, self.current_title)
             # check if the current title is a valid section header
             if valid_header:
-                if current_title:
-                    section_list.append(
-                        {"header": current_title, "text": " ".join(current_text)}
-                    )
-                current_title = element_str
-                current_text = []
-            elif not valid_header and current_title:
-                current_text.append(element_str)
-                current_text.append(
+                sections = self.close_section() if self.current_title else []
+                self.current_title = element_str
+                self.current_text = []
+                return sections
+            elif not valid_header and self.current_title:
+                self.current_text.append(element_str)
+                self.current_text.append(
                     "\n"
                 )  # added for separating subsection/subsubsection name and paragraph
         # check for narrative text (paragraphs/sentences)
         # https://docs.unstructured.io/open-source/concepts/document-elements
         elif (
             element.category in ["NarrativeText", "UncategorizedText", "ListItem"]
-            and current_title
+            and self.current_title
         ):
-            current_text.append(element_str)
-    if current_title:
-        section_list.append({"header": current_title, "text": " ".join(current_text)})
+            self.current_text.append(element_str)
+        return []
+
+    def close_section(self) -> List[Dict[str, str]]:
+        self.held_sections.append(
+            {"header": self.current_title, "text": " ".join(self.current_text)}
+        )
+        self.num_sections += 1
+        if self.num_sections == 1:
+            return []
+        # With two sections the fallback is ruled out, so release everything
+        sections, self.held_sections = self.held_sections, []
+        self.elements = None
+        return sections
+
+    def finish(self) -> List[Dict[str, str]]:
+        """
+        Completes the last section once all elements were added.
+
+        Returns:
+            List[Dict[str, str]]: The sections not returned by add yet.
+        """
+        sections = self.close_section() if self.current_title else []
+        self.current_title = None
 
-    # Chunking by character count (when no headers are found)
-    # https://docs.unstructured.io/open-source/core-functionality/chunking#basic-chunking-strategy
-    if len(section_list) <= 1:
-        chunks = chunk_elements(elements, max_characters=10000)
-        section_list = [{"header": f"Section {i + 1}", "text": chunk.text} for i, chunk in enumerate(chunks)]
+        # Chunking by character count (when no headers are found)
+        # https://docs.unstructured.io/open-source/core-functionality/chunking#basic-chunking-strategy
+        if self.num_sections <= 1:
+            chunks = chunk_elements(self.elements, max_characters=10000)
+            sections = [
+                {"header": f"Section {i + 1}", "text": chunk.text}
+                for i, chunk in enumerate(chunks)
+            ]
+        return sections
+
+
+def iter_sections(elements: Iterable, include_ref=False) -> Iterator[Dict[str, str]]:
+    """
+    Yields the sections of a document as its markdown elements are read, each one
+    as soon as the next valid header closes it.
+
+    Args:
+        elements (Iterable): Elements from partition_md, in document order.
+        include_ref (bool, optional): Whether to include the reference section. Defaults to False.
+
+    Yields:
+        Dict[str, str]: Sections with headers and content.
+    """
+    builder = SectionBuilder(include_ref)
+    for element in elements:
+        yield from builder.add(element)
+    yield from builder.finish()
 
-    return section_list
+
+def pdf_pages_to_elements(
+    pdf_path: str, pages: List[int], hdr_info: pymupdf4llm.IdentifyHeaders = None
+) -> list:
+    """
+    Converts some pages of a PDF file to markdown and partitions it into
+    elements, so that a worker process can do both for a slice of pages.
+    """
+    md_text = pdf_pages_to_md(pdf_path, pages, hdr_info)
+    return partition_md(text=md_text) if md_text.strip() else []
+
+
+def md_to_dict(md_text: str, include_ref=False) -> List[Dict[str, str]]:
+    """
+    Converts markdown text into a list of sections with headers and content.
+
+    Args:
+        md_text (str): Markdown content to parse.
+        include_ref (bool, optional): Whether to include the reference section. Defaults to False.
+
+    Returns:
+        List[Dict[str, str]]: A list of sections with headers and content.
+    """
+    elements = partition_md(text=md_text)
+    return list(iter_sections(elements, include_ref))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+from .setup import HttpClientSingleton
+
+
+__all__ = [
+    "HttpClientSingleton",
+]
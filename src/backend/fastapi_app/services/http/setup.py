@@ -0,0 +1,46 @@
+import aiohttp
+import os
+
+
+class HttpClientSingleton:
+    """
+    Process-wide aiohttp session shared by every outbound request (arXiv API, PDF
+    downloads). Keeping one session alive lets connections, TLS sessions and DNS
+    lookups be reused instead of being re-established on every call.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(HttpClientSingleton, cls).__new__(cls)
+            cls._instance.session = None
+        return cls._instance
+
+    async def initialize(self) -> None:
+        if self.session and not self.session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=int(os.getenv("HTTP_POOL_SIZE", 100)),  # total open connections
+            limit_per_host=int(os.getenv("HTTP_POOL_PER_HOST", 10)),
+            ttl_dns_cache=int(os.getenv("HTTP_DNS_CACHE_TTL", 300)),  # seconds
+            keepalive_timeout=float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30)),
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=float(os.getenv("HTTP_TOTAL_TIMEOUT", 120)),
+            connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", 10)),
+            sock_read=float(os.getenv("HTTP_READ_TIMEOUT", 60)),
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        # Lazily (re)create the session, e.g. when used outside of the app lifespan
+        if self.session is None or self.session.closed:
+            await self.initialize()
+        return self.session
+
+    async def close(self) -> None:
+        if self.session:
+            await self.session.close()
+            self.session = None
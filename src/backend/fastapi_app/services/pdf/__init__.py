@@ -1,3 +1,12 @@
-from .store import fetch_single_pdf
+from .store import fetch_single_pdf, fetch_cached_pdf, pinned_pdf
+from .blob_store import PdfStoreSingleton, parse_arxiv_id, pdf_key, to_pdf_link
 
-__all__ = ["fetch_single_pdf"]
+__all__ = [
+    "fetch_single_pdf",
+    "fetch_cached_pdf",
+    "pinned_pdf",
+    "PdfStoreSingleton",
+    "parse_arxiv_id",
+    "pdf_key",
+    "to_pdf_link",
+]
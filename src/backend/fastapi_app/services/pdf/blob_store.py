@@ -0,0 +1,208 @@
+import asyncio
+import os
+import re
+import hashlib
+import tempfile
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+
+# New-style (2411.02973) and old-style (hep-th/9901001) arXiv ids, optional version
+ARXIV_ID_REGEX = re.compile(
+    r"(?:arxiv\.org/(?:pdf|abs)/)?"
+    r"(?P<id>\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})"
+    r"(?P<version>v\d+)?(?:\.pdf)?/?$"
+)
+
+
+def parse_arxiv_id(pdf_link: str) -> tuple:
+    """
+    Extracts the canonical arXiv id and version from a PDF link or bare id.
+
+    Args:
+        pdf_link (str): arXiv PDF/abstract URL or arXiv id.
+
+    Returns:
+        tuple: (arxiv_id, version) where version is None if not specified,
+            or (None, None) if the link isn't an arXiv link.
+    """
+    match = ARXIV_ID_REGEX.search(pdf_link.strip())
+    if not match:
+        return None, None
+    return match.group("id"), match.group("version")
+
+
+def to_pdf_link(pdf_link_or_id: str) -> str:
+    """
+    Turns a bare arXiv id (e.g. 2411.02973v1) into the PDF link the arXiv API
+    returns for it, so both forms share cache entries. Links are returned as is.
+    """
+    if "://" in pdf_link_or_id:
+        return pdf_link_or_id
+    arxiv_id, version = parse_arxiv_id(pdf_link_or_id)
+    if arxiv_id is None:
+        return pdf_link_or_id
+    return f"http://arxiv.org/pdf/{arxiv_id}{version or ''}"
+
+
+def pdf_key(pdf_link: str) -> str:
+    """
+    Maps a PDF link to the key it is stored under. arXiv versions are immutable,
+    so id plus version identifies the content; links without a version refer to
+    whatever was the latest version when first downloaded.
+    """
+    arxiv_id, version = parse_arxiv_id(pdf_link)
+    if arxiv_id is None:
+        return f"url_{hashlib.sha256(pdf_link.encode()).hexdigest()}"
+    return f"{arxiv_id.replace('/', '_')}{version or ''}"
+
+
+class PdfStoreSingleton:
+    """
+    Size-bounded on-disk store for downloaded PDFs with least-recently-used eviction.
+    Each worker tracks and bounds the PDFs it stored or read, so the cap applies
+    per worker; workers still share the files of the directory.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PdfStoreSingleton, cls).__new__(cls)
+            cls._instance.root = os.getenv("PDF_STORE_DIR", "/tmp/scholarly/pdfs")
+            cls._instance.max_bytes = int(os.getenv("PDF_STORE_MAX_BYTES", 2 * 1024**3))
+            cls._instance.index = OrderedDict()  # {key: size}, oldest access first
+            cls._instance.total_bytes = 0
+            cls._instance.pins = Counter()  # {key: number of users}, never evicted
+            cls._instance.initialized = False
+        return cls._instance
+
+    def initialize(self) -> None:
+        if self.initialized:
+            return
+        os.makedirs(self.root, exist_ok=True)
+
+        # Rebuild the LRU order from access times left by previous runs
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".tmp"):
+                os.remove(path)  # leftover from an interrupted write
+            elif name.endswith(".pdf"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[: -len(".pdf")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.total_bytes += size
+        self.initialized = True
+        self._remove(self._evict())
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pdf")
+
+    def get(self, key: str) -> str:
+        """
+        Returns the local path of a stored PDF and marks it as recently used,
+        or None if it isn't stored.
+        """
+        self.initialize()
+        path = self.path(key)
+        try:
+            os.utime(path)  # persist the access for LRU order across restarts
+        except FileNotFoundError:  # never stored, or removed by another worker
+            if key in self.index:
+                self.total_bytes -= self.index.pop(key)
+            return None
+        if key not in self.index:  # stored by another worker
+            size = os.path.getsize(path)
+            self.index[key] = size
+            self.total_bytes += size
+        self.index.move_to_end(key)
+        return path
+
+    def pin(self, key: str) -> None:
+        # Pinned PDFs aren't evicted, e.g. while a process is still reading them
+        self.pins[key] += 1
+
+    def unpin(self, key: str) -> None:
+        self.pins[key] -= 1
+        if self.pins[key] <= 0:
+            del self.pins[key]
+
+    @asynccontextmanager
+    async def writer(self, key: str):
+        """
+        Yields a coroutine function that appends bytes to the PDF stored under
+        key. The PDF only becomes visible once the block exits successfully, so
+        readers never see partial files. Disk I/O runs in threads to keep the
+        event loop responsive.
+        """
+        self.initialize()
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp", dir=self.root)
+        f = os.fdopen(fd, "wb")
+
+        async def write(data: bytes) -> None:
+            await asyncio.to_thread(f.write, data)
+
+        try:
+            yield write
+            size = await asyncio.to_thread(self._commit, f, tmp_path, self.path(key))
+        except BaseException:
+            f.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.total_bytes += size - self.index.pop(key, 0)
+        self.index[key] = size
+        evicted = self._evict()
+        if evicted:
+            await asyncio.to_thread(self._remove, evicted)
+
+    @staticmethod
+    def _commit(f, tmp_path: str, path: str) -> int:
+        with f:
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def _evict(self) -> list:
+        """
+        Evicts the least recently used unpinned PDFs until the store fits its
+        cap, always keeping the most recent entry even if it alone exceeds it.
+        Evicted files are only renamed here, which is cheap and takes them out
+        of sight at once; deleting them is left to _remove.
+
+        Returns:
+            list: Paths of the renamed files.
+        """
+        evicted = []
+        for key in list(self.index)[:-1]:
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key in self.pins:
+                continue
+            self.total_bytes -= self.index.pop(key)
+            trash_path = os.path.join(self.root, f".tmp-evicted-{key}")
+            try:
+                os.replace(self.path(key), trash_path)
+            except FileNotFoundError:  # removed by another worker's eviction
+                continue
+            evicted.append(trash_path)
+        return evicted
+
+    @staticmethod
+    def _remove(paths: list) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "pinned": len(self.pins),
+        }
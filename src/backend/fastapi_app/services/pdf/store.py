@@ -1,20 +1,73 @@
-import asyncio
-import aiohttp
+from contextlib import asynccontextmanager
 from fastapi import HTTPException
+from services.http import HttpClientSingleton
+from .blob_store import PdfStoreSingleton, pdf_key
+
+WRITE_BUFFER_BYTES = 1 << 20  # Downloads are written to disk in blocks this large
 
 
 async def fetch_single_pdf(pdf_link: str) -> bytes:
     """
     Fetches the binary content of a single PDF from the given URL.
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(pdf_link) as response:
-            if response.status != 200:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail={
-                        "error": "Failed to fetch PDF from the source.",
-                        "instance": pdf_link,
-                    },
-                )
-            return await response.read()  # Return binary content of the PDF
+    session = await HttpClientSingleton().get_session()
+    async with session.get(pdf_link) as response:
+        if response.status != 200:
+            raise HTTPException(
+                status_code=response.status,
+                detail={
+                    "error": "Failed to fetch PDF from the source.",
+                    "instance": pdf_link,
+                },
+            )
+        return await response.read()  # Return binary content of the PDF
+
+
+async def fetch_cached_pdf(pdf_link: str) -> str:
+    """
+    Returns the local path of the PDF behind the given URL, downloading it into
+    the PDF store only if it isn't stored yet. The download is streamed to disk,
+    so the PDF is never held in memory. The PDF may be evicted as soon as this
+    returns; use pinned_pdf to read it.
+    """
+    store = PdfStoreSingleton()
+    key = pdf_key(pdf_link)
+    path = store.get(key)
+    if path is not None:
+        return path
+
+    session = await HttpClientSingleton().get_session()
+    async with session.get(pdf_link) as response:
+        if response.status != 200:
+            raise HTTPException(
+                status_code=response.status,
+                detail={
+                    "error": "Failed to fetch PDF from the source.",
+                    "instance": pdf_link,
+                },
+            )
+        async with store.writer(key) as write:
+            buffer = bytearray()
+            async for chunk in response.content.iter_chunked(1 << 16):
+                buffer += chunk
+                if len(buffer) >= WRITE_BUFFER_BYTES:
+                    await write(bytes(buffer))
+                    buffer.clear()
+            await write(bytes(buffer))
+    return store.path(key)
+
+
+@asynccontextmanager
+async def pinned_pdf(pdf_link: str):
+    """
+    Like fetch_cached_pdf, but yields the path of the PDF and keeps it from
+    being evicted until the block exits, e.g. while it's being chunked.
+    """
+    store = PdfStoreSingleton()
+    # Pinned before it's stored, so another download can't evict it in between
+    key = pdf_key(pdf_link)
+    store.pin(key)
+    try:
+        yield await fetch_cached_pdf(pdf_link)
+    finally:
+        store.unpin(key)
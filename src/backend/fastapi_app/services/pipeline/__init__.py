@@ -0,0 +1,14 @@
+from .summarize import summarize_pdf, get_or_create_summary
+from .batch import summarize_pdfs
+from .prefetch import PrefetchSingleton
+from .jobs import submit_summary_job, run_summary_job, iter_job_events
+
+__all__ = [
+    "summarize_pdf",
+    "get_or_create_summary",
+    "summarize_pdfs",
+    "PrefetchSingleton",
+    "submit_summary_job",
+    "run_summary_job",
+    "iter_job_events",
+]
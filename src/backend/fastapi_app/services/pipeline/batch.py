@@ -0,0 +1,128 @@
+import asyncio
+from services.redis import RedisSingleton, ProcessStatus, LEASE_ACQUIRED
+from services.pdf import pinned_pdf, to_pdf_link
+from services.chunker import ChunkerSingleton
+from services.spark import SparkSessionSingleton
+from services.summarizer import SummarizerSingleton, partition_sections
+from utilities import log_async
+from .lease import LEASE_TTL, join_spark_job_group, new_lease_owner, run_with_leases
+from .summarize import get_or_create_summary
+
+
+def summarize_papers(chunked_papers: dict) -> dict:
+    """
+    Summarizes the sections of several papers in a single Spark job.
+
+    Args:
+        chunked_papers (dict): {pdf_link: sections} of the papers to summarize.
+
+    Returns:
+        dict: {pdf_link: summary} with sections in their original order.
+    """
+    sections = [
+        {"paper": pdf_link, "index": index, **section}
+        for pdf_link, chunked_pdf in chunked_papers.items()
+        for index, section in enumerate(chunked_pdf)
+    ]
+    spark_context = SparkSessionSingleton().get_spark_context()
+    join_spark_job_group(spark_context)
+    sections_rdd = partition_sections(spark_context, sections)
+    results = SummarizerSingleton().summarize_chunked_sections(sections_rdd).collect()
+
+    summaries = {
+        pdf_link: [None] * len(chunks) for pdf_link, chunks in chunked_papers.items()
+    }
+    for result in results:
+        pdf_link, index = result.pop("paper"), result.pop("index")
+        summaries[pdf_link][index] = result
+    return summaries
+
+
+async def summarize_pdfs(pdf_links: list) -> dict:
+    """
+    Summarizes many PDFs at once: cached summaries are returned directly, and
+    all other papers are fetched and chunked concurrently, then summarized in
+    one Spark job.
+
+    Args:
+        pdf_links (list): PDF links or arXiv ids.
+
+    Returns:
+        dict: {pdf_link: summary or exception} for every distinct PDF.
+    """
+    rd = RedisSingleton()
+    pdf_links = list(dict.fromkeys(to_pdf_link(link) for link in pdf_links))
+    results = {}
+
+    # Serve what is cached, and summarize the rest whose lease this batch gets;
+    # the others are left to the requests already summarizing them
+    papers = await rd.get_papers(pdf_links)
+    candidates = []
+    for pdf_link, paper in zip(pdf_links, papers):
+        if (
+            paper
+            and paper["status"] == ProcessStatus.COMPLETED
+            and paper["summary"] is not None
+        ):
+            results[pdf_link] = paper["summary"]
+        else:
+            candidates.append(pdf_link)
+    if results:
+        await rd.refresh_papers(list(results))
+
+    owner = new_lease_owner()
+    leases = await rd.acquire_pdf_leases(candidates, owner, LEASE_TTL)
+    misses = [link for link in candidates if leases[link] == LEASE_ACQUIRED]
+    waiting = [link for link in candidates if leases[link] != LEASE_ACQUIRED]
+    print(f"Batch of {len(pdf_links)} PDFs: {len(misses)} to summarize.")
+
+    async def compute() -> dict:
+        async def fetch_and_chunk(pdf_link: str) -> list:
+            async with pinned_pdf(pdf_link) as pdf_path:
+                return await ChunkerSingleton().chunk_pdf_cached(pdf_path)
+
+        async with log_async(f"Fetching and chunking {len(misses)} PDFs"):
+            chunked = await asyncio.gather(
+                *map(fetch_and_chunk, misses), return_exceptions=True
+            )
+        computed = {}
+        chunked_papers = {}
+        for pdf_link, chunks in zip(misses, chunked):
+            if isinstance(chunks, Exception):
+                computed[pdf_link] = chunks
+            else:
+                chunked_papers[pdf_link] = chunks
+
+        if chunked_papers:
+            try:
+                async with log_async(f"Summarizing {len(chunked_papers)} PDFs"):
+                    computed.update(
+                        await asyncio.to_thread(summarize_papers, chunked_papers)
+                    )
+            except Exception as e:
+                computed.update({pdf_link: e for pdf_link in chunked_papers})
+        return computed
+
+    async def compute_misses() -> None:
+        if not misses:
+            return
+        try:
+            results.update(await run_with_leases(misses, owner, compute()))
+        except Exception as e:
+            results.update({pdf_link: e for pdf_link in misses})
+        finally:
+            # Release every lease, as FAILED where there is no summary
+            summaries = {}
+            for pdf_link in misses:
+                result = results.get(pdf_link)
+                summaries[pdf_link] = None if isinstance(result, Exception) else result
+            await rd.release_pdf_leases(owner, summaries)
+
+    async def wait_for(pdf_link: str) -> None:
+        try:
+            results[pdf_link] = await get_or_create_summary(pdf_link)
+        except Exception as e:
+            results[pdf_link] = e
+
+    await asyncio.gather(compute_misses(), *map(wait_for, waiting))
+    return {pdf_link: results[pdf_link] for pdf_link in pdf_links}
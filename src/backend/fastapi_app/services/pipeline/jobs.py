@@ -0,0 +1,58 @@
+import time
+from uuid import uuid4
+from services.redis import RedisSingleton
+from .summarize import get_or_create_summary
+
+TERMINAL_JOB_EVENTS = ("completed", "failed")
+
+
+async def submit_summary_job(pdf_link: str) -> str:
+    """
+    Registers a summarization job in Redis and returns its id. The caller is
+    responsible for scheduling run_summary_job.
+    """
+    job_id = uuid4().hex
+    await RedisSingleton().create_job(job_id, pdf_link)
+    await RedisSingleton().append_job_event(job_id, {"event": "queued"})
+    return job_id
+
+
+async def run_summary_job(job_id: str, pdf_link: str) -> None:
+    """
+    Summarizes the job's PDF, recording every stage transition as a job event.
+    """
+    rd = RedisSingleton()
+
+    async def on_event(event: str, data: dict) -> None:
+        await rd.append_job_event(job_id, {"event": event, **data})
+
+    await rd.update_job(job_id, status="running", started_at=time.time())
+    try:
+        summary = await get_or_create_summary(pdf_link, on_event)
+    except Exception as e:
+        await rd.update_job(job_id, status="failed", error=str(e))
+        await rd.append_job_event(job_id, {"event": "failed", "error": str(e)})
+        return
+
+    await rd.update_job(job_id, status="completed", summary=summary)
+    await rd.append_job_event(job_id, {"event": "completed", "summary": summary})
+
+
+async def iter_job_events(job_id: str):
+    """
+    Yields every event of a job, from the first one, until it finishes. Yields
+    None whenever no event arrived for a while so callers can send keep-alives.
+    """
+    rd = RedisSingleton()
+    last_id = "0"
+    while True:
+        events = await rd.read_job_events(job_id, last_id, block_ms=15000)
+        if not events:
+            if await rd.get_job(job_id) is None:  # expired
+                return
+            yield None
+            continue
+        for last_id, event in events:
+            yield event
+            if event["event"] in TERMINAL_JOB_EVENTS:
+                return
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import socket
+from collections import deque
+from contextvars import ContextVar
+from typing import Awaitable, List
+from uuid import uuid4
+from pyspark import SparkContext
+from services.redis import RedisSingleton
+from services.spark import SparkSessionSingleton
+
+# Seconds a lease lasts without renewal, i.e. how soon another worker can take
+# over a paper whose worker died. Holders renew it every third of that.
+LEASE_TTL = float(os.getenv("SUMMARY_LEASE_TTL", 30))
+
+# Spark job group of the work run under leases, named after the lease owner.
+# asyncio.to_thread copies it into the threads that submit the Spark jobs.
+SPARK_JOB_GROUP = ContextVar("spark_job_group", default=None)
+# Threads may outlive the cancelled work, so the groups are remembered for a while
+CANCELLED_JOB_GROUPS = deque(maxlen=1000)
+
+
+class LeaseLostError(Exception):
+    """
+    Raised when a worker's leases expired and were taken over while it was
+    still summarizing the papers.
+    """
+
+
+def new_lease_owner() -> str:
+    # Unique per computation, even between requests of the same worker
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex}"
+
+
+def join_spark_job_group(spark_context: SparkContext) -> None:
+    """
+    Puts the Spark jobs the calling thread submits next into the job group of
+    the leases they run under, if any, so they're cancelled with the leases.
+    Call it from the thread right before submitting the jobs.
+
+    Raises:
+        LeaseLostError: If the leases were already lost.
+    """
+    group = SPARK_JOB_GROUP.get()
+    if group in CANCELLED_JOB_GROUPS:
+        raise LeaseLostError(f"Lost the leases of {group}")
+    if group is None:
+        # Threads are reused, so clear the group of a previous job
+        spark_context.setLocalProperty("spark.jobGroup.id", None)
+    else:
+        spark_context.setJobGroup(group, "Summarizing", interruptOnCancel=True)
+
+
+async def run_with_leases(pdf_links: List[str], owner: str, work: Awaitable):
+    """
+    Awaits work while a heartbeat renews owner's leases on the papers. Once none
+    of them can be renewed (they were taken over, e.g. after the event loop was
+    blocked for longer than LEASE_TTL), the work is cancelled since its results
+    couldn't be stored anymore. That includes its Spark jobs, provided the
+    threads submitting them called join_spark_job_group.
+
+    Raises:
+        LeaseLostError: If the work was cancelled for losing its leases.
+    """
+    rd = RedisSingleton()
+    token = SPARK_JOB_GROUP.set(owner)
+    task = asyncio.ensure_future(work)  # Runs in a copy of the context
+    SPARK_JOB_GROUP.reset(token)
+    held = list(pdf_links)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=LEASE_TTL / 3)
+            if done:
+                return task.result()
+            try:
+                renewed = await rd.renew_pdf_leases(held, owner, LEASE_TTL)
+            except Exception as e:
+                # Keep working; the lease only lapses if Redis stays unreachable
+                print(f"Failed to renew the leases of {owner}: {e}")
+                continue
+            held = [pdf_link for pdf_link, ok in zip(held, renewed) if ok]
+            if not held:
+                CANCELLED_JOB_GROUPS.append(owner)
+                SparkSessionSingleton().get_spark_context().cancelJobGroup(owner)
+                raise LeaseLostError(f"Lost the leases on {', '.join(pdf_links)}")
+    finally:
+        task.cancel()
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from services.redis import RedisSingleton
+from services.pdf import pinned_pdf
+from services.chunker import ChunkerSingleton
+
+
+class PrefetchSingleton:
+    """
+    Downloads and chunks the top results of a query in the background, so a later
+    summarize request finds them in the PDF store and chunk cache.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PrefetchSingleton, cls).__new__(cls)
+            cls._instance.top_k = int(os.getenv("PREFETCH_TOP_K", 2))
+            cls._instance.concurrency = int(os.getenv("PREFETCH_CONCURRENCY", 2))
+            cls._instance.budget_per_minute = int(
+                os.getenv("PREFETCH_BUDGET_PER_MINUTE", 30)
+            )
+            cls._instance.queue = None
+            cls._instance.workers = []
+            cls._instance.recent = OrderedDict()  # recently enqueued links
+            cls._instance.window = (0, 0)  # (minute, links enqueued in it)
+            cls._instance.stats = {
+                "enqueued": 0,
+                "dropped": 0,
+                "completed": 0,
+                "skipped": 0,
+                "failed": 0,
+            }
+        return cls._instance
+
+    def start(self) -> None:
+        if self.top_k <= 0 or self.workers:
+            return
+        self.queue = asyncio.Queue(maxsize=self.budget_per_minute)
+        self.workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    async def close(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def enqueue(self, pdf_links: list) -> None:
+        """
+        Schedules the first top_k links for prefetching. Never waits: links are
+        dropped when the queue is full or the per-minute budget is spent.
+        """
+        if not self.workers:
+            return
+        for pdf_link in pdf_links[: self.top_k]:
+            if pdf_link in self.recent:
+                continue
+            minute, count = self.window
+            if minute != int(time.time() // 60):
+                minute, count = int(time.time() // 60), 0
+            if count >= self.budget_per_minute or self.queue.full():
+                self.stats["dropped"] += 1
+                continue
+            self.window = (minute, count + 1)
+            self.queue.put_nowait(pdf_link)
+            self.stats["enqueued"] += 1
+
+            self.recent[pdf_link] = None
+            if len(self.recent) > 1000:
+                self.recent.popitem(last=False)
+
+    async def _worker(self) -> None:
+        while True:
+            pdf_link = await self.queue.get()
+            try:
+                if await RedisSingleton().get_pdf_summary(pdf_link) is not None:
+                    self.stats["skipped"] += 1  # already summarized
+                    continue
+                async with pinned_pdf(pdf_link) as pdf_path:
+                    await ChunkerSingleton().chunk_pdf_cached(pdf_path)
+                self.stats["completed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"Prefetching {pdf_link} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "pending": self.queue.qsize() if self.queue else 0}
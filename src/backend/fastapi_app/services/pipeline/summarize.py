@@ -0,0 +1,184 @@
+import asyncio
+import os
+from contextlib import AsyncExitStack
+from typing import AsyncIterator
+from services.redis import RedisSingleton, ProcessStatus, LEASE_ACQUIRED, LEASE_HELD
+from services.pdf import pinned_pdf
+from services.chunker import ChunkerSingleton
+from services.spark import SparkSessionSingleton
+from services.summarizer import SummarizerSingleton, partition_sections
+from utilities import log_async
+from .lease import LEASE_TTL, join_spark_job_group, new_lease_owner, run_with_leases
+
+# Max seconds to wait for another request that is already summarizing the same PDF
+SUMMARY_WAIT_TIMEOUT = float(os.getenv("SUMMARY_WAIT_TIMEOUT", 240))
+
+
+async def iter_section_summaries(sections: AsyncIterator[dict]):
+    """
+    Summarizes the sections on Spark and yields each {"index", "header", "summary"}
+    as soon as it is ready, in completion order. Sections are indexed in the
+    order they arrive and submitted while later ones are still being parsed, in
+    batches: whenever no Spark job is running, or once there is a section for
+    every core.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    spark_context = SparkSessionSingleton().get_spark_context()
+
+    def summarize(batch: list) -> None:
+        # Runs in a thread since Spark blocks until each job finishes
+        join_spark_job_group(spark_context)
+        chunked_pdf_rdd = partition_sections(spark_context, batch)
+        for result in SummarizerSingleton().stream_chunked_sections(chunked_pdf_rdd):
+            loop.call_soon_threadsafe(queue.put_nowait, result)
+
+    async def produce() -> None:
+        parsed = asyncio.Queue()
+
+        async def read() -> None:
+            try:
+                async for section in sections:
+                    parsed.put_nowait(section)
+            except Exception as e:
+                parsed.put_nowait(e)
+            finally:
+                parsed.put_nowait(done)
+
+        reader = asyncio.create_task(read())
+        jobs, batch, index = [], [], 0
+        try:
+            finished = False
+            while not finished:
+                # Take every section parsed so far, not just the next one
+                items = [await parsed.get()]
+                while not parsed.empty():
+                    items.append(parsed.get_nowait())
+                for item in items:
+                    if isinstance(item, Exception):
+                        raise item
+                    if item is done:
+                        finished = True
+                    else:
+                        batch.append({"index": index, **item})
+                        index += 1
+
+                idle = all(job.done() for job in jobs)
+                if batch and (
+                    finished or idle or len(batch) >= spark_context.defaultParallelism
+                ):
+                    jobs.append(
+                        asyncio.create_task(asyncio.to_thread(summarize, batch))
+                    )
+                    batch = []
+            await asyncio.gather(*jobs)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            reader.cancel()
+            queue.put_nowait(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await queue.get()) is not done:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Stop submitting batches if the consumer gave up, e.g. on lease loss
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+async def summarize_pdf(pdf_link: str, on_event=None) -> list:
+    """
+    Runs the fetch -> chunk -> Spark summarization pipeline for a single PDF.
+
+    Args:
+        pdf_link (str): Link to the PDF.
+        on_event (callable, optional): Coroutine called as on_event(event, data)
+            whenever a stage completes.
+
+    Returns:
+        list: Summary of each section as {"header", "summary"}.
+    """
+
+    async def emit(event: str, **data) -> None:
+        if on_event is not None:
+            await on_event(event, data)
+
+    num_sections = 0
+    summaries = {}
+    async with AsyncExitStack() as stack:
+        async with log_async("Fetching PDF from arXiv"):
+            # Kept in the store until every section was parsed
+            pdf_path = await stack.enter_async_context(pinned_pdf(pdf_link))
+        await emit("downloaded")
+
+        async def iter_sections():
+            # Sections are summarized while the rest of the PDF is being parsed
+            nonlocal num_sections
+            async with log_async("Chunking PDF into sections"):
+                chunker = ChunkerSingleton()
+                async for section in chunker.iter_pdf_sections_cached(pdf_path):
+                    num_sections += 1
+                    yield section
+            await emit("chunked", sections=num_sections)
+
+        async with log_async("Summarizing each chunk"):
+            async for section in iter_section_summaries(iter_sections()):
+                await emit("section_summarized", **section)
+                index = section.pop("index")
+                summaries[index] = section
+
+    return [summaries[index] for index in range(num_sections)]
+
+
+async def get_or_create_summary(pdf_link: str, on_event=None) -> list:
+    """
+    Returns the cached summary of a PDF, waits for the worker already
+    summarizing it, or summarizes it. Only the holder of the PDF's lease
+    summarizes it, so each PDF is summarized once across all workers and hosts;
+    the lease is taken over if its holder dies.
+
+    Raises:
+        TimeoutError: If another worker is still summarizing the PDF after
+            SUMMARY_WAIT_TIMEOUT seconds.
+        Exception: Any error raised while summarizing, after marking it FAILED.
+    """
+    rd = RedisSingleton()
+    owner = new_lease_owner()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SUMMARY_WAIT_TIMEOUT
+    while True:
+        paper = (await rd.get_papers([pdf_link]))[0]
+        if (
+            paper
+            and paper["status"] == ProcessStatus.COMPLETED
+            and paper["summary"] is not None
+        ):
+            await rd.refresh_papers([pdf_link])
+            return paper["summary"]
+
+        lease = (await rd.acquire_pdf_leases([pdf_link], owner, LEASE_TTL))[pdf_link]
+        if lease == LEASE_ACQUIRED:
+            break
+        if lease == LEASE_HELD:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"Timed out waiting for the summary of {pdf_link}")
+            # Wait to be notified, retrying the lease in case its holder died
+            await rd.wait_for_pdf_process_status(pdf_link, min(remaining, LEASE_TTL))
+
+    summary = None
+    try:
+        summary = await run_with_leases(
+            [pdf_link], owner, summarize_pdf(pdf_link, on_event)
+        )
+        return summary
+    finally:
+        # Summary and COMPLETED status are written together, so notified
+        # waiters can read it right away
+        await rd.release_pdf_leases(owner, {pdf_link: summary})
@@ -1,7 +1,11 @@
 from .setup import RedisSingleton
 from .process_status import ProcessStatus
+from .lease import LEASE_ACQUIRED, LEASE_HELD, LEASE_COMPLETED
 
 __all__ = [
     "RedisSingleton",
     "ProcessStatus",
+    "LEASE_ACQUIRED",
+    "LEASE_HELD",
+    "LEASE_COMPLETED",
 ]
@@ -0,0 +1,28 @@
+import os
+import zlib
+import msgpack
+
+# Summaries at least this large (once packed) are compressed
+COMPRESS_MIN_BYTES = int(os.getenv("SUMMARY_COMPRESS_MIN_BYTES", 512))
+COMPRESSION_ENABLED = os.getenv("SUMMARY_COMPRESSION", "zlib") == "zlib"
+
+
+def encode_summary(summary: list) -> tuple:
+    """
+    Packs a summary with msgpack, compressing it with zlib if it's large enough.
+
+    Returns:
+        tuple: The encoded bytes and the name of the encoding, needed to decode them.
+    """
+    data = msgpack.packb(summary, use_bin_type=True)
+    if COMPRESSION_ENABLED and len(data) >= COMPRESS_MIN_BYTES:
+        return zlib.compress(data), "msgpack+zlib"
+    return data, "msgpack"
+
+
+def decode_summary(data: bytes, encoding: str) -> list:
+    if encoding == "msgpack+zlib":
+        data = zlib.decompress(data)
+    elif encoding != "msgpack":
+        raise ValueError(f"Unknown summary encoding: {encoding}")
+    return msgpack.unpackb(data, raw=False)
@@ -0,0 +1,56 @@
+# Lua scripts behind the single-flight lease on summarizing a paper. Each runs
+# atomically, so exactly one worker can hold the lease of a paper at a time and
+# a worker whose lease expired (and was taken over) can no longer write.
+# KEYS[1] is the lease key and KEYS[2] the paper hash. Scripts that rewrite the
+# paper publish its link on the invalidation channel, to drop it from workers'
+# local tier.
+
+LEASE_ACQUIRED = 1
+LEASE_HELD = 0  # Another worker holds the lease
+LEASE_COMPLETED = 2  # The paper was summarized in the meantime
+
+# ARGV: owner, lease ttl (ms), updated_at, paper ttl (ms), invalidation channel,
+#       pdf link
+ACQUIRE_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'status') == 'COMPLETED'
+        and redis.call('HEXISTS', KEYS[2], 'summary') == 1 then
+    return 2
+end
+if not redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 0
+end
+redis.call('HSET', KEYS[2], 'status', 'PROCCESSING', 'updated_at', ARGV[3])
+redis.call('HDEL', KEYS[2], 'summary', 'encoding', 'sections')
+redis.call('PEXPIRE', KEYS[2], ARGV[4])
+redis.call('PUBLISH', ARGV[5], ARGV[6])
+return 1
+"""
+
+# ARGV: owner, lease ttl (ms), paper ttl (ms)
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+redis.call('PEXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+# ARGV: owner, status, updated_at, paper ttl (ms), status channel,
+#       invalidation channel, pdf link[, summary, encoding, sections]
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[2], 'status', ARGV[2], 'updated_at', ARGV[3])
+if #ARGV > 7 then
+    redis.call('HSET', KEYS[2], 'summary', ARGV[8], 'encoding', ARGV[9], 'sections', ARGV[10])
+else
+    redis.call('HDEL', KEYS[2], 'summary', 'encoding', 'sections')
+end
+redis.call('PEXPIRE', KEYS[2], ARGV[4])
+redis.call('PUBLISH', ARGV[6], ARGV[7])
+redis.call('PUBLISH', ARGV[5], ARGV[2])
+return 1
+"""
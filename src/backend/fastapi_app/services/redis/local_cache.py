@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class LocalCache:
+    """
+    In-process LRU cache with a cap on the total size of its values and a TTL
+    per entry. Values are shared between callers, so they must not be mutated.
+
+    Args:
+        max_bytes (int): Total size of the values above which the least
+            recently used entries are evicted.
+        ttl (float): Seconds an entry is served before it must be read again.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # {key: (value, size, expires_at)}, least recently used first
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        # Bumped on every invalidation, so reads that raced one don't store stale values
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] < time.monotonic():
+            self.remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, value: Any, size: int, generation: int) -> None:
+        """
+        Stores the value, unless an invalidation happened since generation was
+        read (before the value was fetched) or it's larger than the whole cache.
+        """
+        if generation != self.generation or size > self.max_bytes:
+            return
+        self.remove(key)
+        self.entries[key] = (value, size, time.monotonic() + self.ttl)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            self.evictions += 1
+
+    def remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def invalidate(self, key: str) -> None:
+        self.generation += 1
+        self.remove(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
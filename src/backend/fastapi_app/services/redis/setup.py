@@ -1,7 +1,28 @@
 import aioredis
+import asyncio
 import os
+from .codec import decode_summary, encode_summary
+from .lease import (
+    ACQUIRE_SCRIPT,
+    LEASE_ACQUIRED,
+    LEASE_COMPLETED,
+    RELEASE_SCRIPT,
+    RENEW_SCRIPT,
+)
 from .process_status import ProcessStatus
 import json
+import msgpack
+import time
+from typing import List
+from .local_cache import LocalCache
+
+JOB_TTL = int(os.getenv("JOB_TTL", 3600))  # seconds a job and its events are kept
+PAPER_TTL = int(os.getenv("PAPER_TTL", 60))  # seconds a paper hash is kept
+# In-process tier in front of the paper hashes, for summaries and failures
+PAPER_LOCAL_CACHE_BYTES = int(os.getenv("PAPER_LOCAL_CACHE_BYTES", 64 * 1024**2))
+PAPER_LOCAL_CACHE_TTL = float(os.getenv("PAPER_LOCAL_CACHE_TTL", 30))
+# Lease scripts publish the link of each paper they rewrite on this channel
+PAPER_INVALIDATION_CHANNEL = "paper_invalidate"
 
 
 class RedisSingleton:
@@ -10,43 +31,463 @@ class RedisSingleton:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(RedisSingleton, cls).__new__(cls)
-            cls._instance.pdf_summary = None  # {pdf_link: summary}
-            cls._instance.pdf_process_status = None  # {pdf_link: status}
+            # {paper:pdf_link: hash of status, summary and metadata}
+            cls._instance.papers = None
+            cls._instance.arxiv_results = None  # {query_key: {stored_at, data}}
+            cls._instance.pdf_chunks = None  # {pdf_hash:parser_version: sections}
+            cls._instance.jobs = None  # {job_id: job hash, job_id: event stream}
+            cls._instance.llm_cache = None  # LLM responses and rate limits of executors
+            # {pdf_link: paper}, only filled while invalidations are received
+            cls._instance.local_papers = LocalCache(
+                PAPER_LOCAL_CACHE_BYTES, PAPER_LOCAL_CACHE_TTL
+            )
+            cls._instance.local_papers_coherent = False
+            cls._instance.paper_invalidation_task = None
+            cls._instance.paper_refreshed_at = {}  # {pdf_link: monotonic time}
+            cls._instance.redis_paper_hits = 0
+            cls._instance.redis_paper_misses = 0
         return cls._instance
 
     async def initialize(self) -> None:
-        if not self.pdf_summary:
-            self.pdf_summary = await aioredis.from_url(f'{os.environ["REDIS_URL"]}/0')
-        if not self.pdf_process_status:
-            self.pdf_process_status = await aioredis.from_url(
-                f'{os.environ["REDIS_URL"]}/1'
+        if not self.papers:
+            self.papers = await aioredis.from_url(f'{os.environ["REDIS_URL"]}/0')
+        if not self.arxiv_results:
+            self.arxiv_results = await aioredis.from_url(f'{os.environ["REDIS_URL"]}/2')
+        if not self.pdf_chunks:
+            self.pdf_chunks = await aioredis.from_url(f'{os.environ["REDIS_URL"]}/3')
+        if not self.jobs:
+            self.jobs = await aioredis.from_url(f'{os.environ["REDIS_URL"]}/4')
+        if not self.llm_cache:
+            self.llm_cache = await aioredis.from_url(f'{os.environ["REDIS_URL"]}/5')
+        if not self.paper_invalidation_task:
+            self.paper_invalidation_task = asyncio.create_task(
+                self.listen_for_paper_invalidations()
             )
 
-    async def get_pdf_summary(self, pdf_link: str) -> dict:
-        data = await self.pdf_summary.get(pdf_link)
-        if data is None:
+    async def listen_for_paper_invalidations(self) -> None:
+        """
+        Drops papers from the local tier as soon as any worker rewrites them.
+        The local tier is only used while subscribed, and is cleared whenever
+        the subscription is (re)established since invalidations may have been
+        missed in between.
+        """
+        while True:
+            try:
+                async with self.papers.pubsub() as pubsub:
+                    await pubsub.subscribe(PAPER_INVALIDATION_CHANNEL)
+                    self.local_papers.clear()
+                    self.local_papers_coherent = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.local_papers.invalidate(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Paper invalidation subscription failed: {e}")
+            finally:
+                self.local_papers_coherent = False
+                self.local_papers.clear()
+            await asyncio.sleep(1)
+
+    @staticmethod
+    def paper_key(pdf_link: str) -> str:
+        return f"paper:{pdf_link}"
+
+    @staticmethod
+    def lease_key(pdf_link: str) -> str:
+        return f"lease:{pdf_link}"
+
+    @staticmethod
+    def parse_paper(fields: dict) -> dict:
+        if not fields:
             return None
-        return json.loads(data)
+        fields = {key.decode(): value for key, value in fields.items()}
+        paper = {
+            "status": ProcessStatus[fields["status"].decode()],
+            "updated_at": float(fields["updated_at"]),
+            "summary": None,
+        }
+        if "summary" in fields:
+            paper["summary"] = decode_summary(
+                fields["summary"], fields["encoding"].decode()
+            )
+            paper["sections"] = int(fields["sections"])
+        return paper
+
+    @staticmethod
+    def is_terminal(paper: dict) -> bool:
+        if paper is None:
+            return False
+        if paper["status"] == ProcessStatus.COMPLETED:
+            return paper["summary"] is not None
+        return paper["status"] == ProcessStatus.FAILED
+
+    async def get_papers(self, pdf_links: List[str]) -> List[dict]:
+        """
+        Reads the status, summary and metadata of many papers, from the local
+        tier if they are summarized (or failed) and in one round trip otherwise.
+        Papers must not be mutated since the local tier shares them.
+
+        Returns:
+            List[dict]: {"status", "updated_at", "summary"[, "sections"]} of each
+                paper, or None for papers that aren't stored.
+        """
+        papers = [self.local_papers.get(pdf_link) for pdf_link in pdf_links]
+        misses = [i for i, paper in enumerate(papers) if paper is None]
+        if not misses:
+            return papers
+
+        # Read before the round trip, so papers invalidated during it aren't stored
+        generation = self.local_papers.generation
+        async with self.papers.pipeline(transaction=False) as pipe:
+            for i in misses:
+                pipe.hgetall(self.paper_key(pdf_links[i]))
+            results = await pipe.execute()
+        for i, fields in zip(misses, results):
+            paper = papers[i] = self.parse_paper(fields)
+            if not self.is_terminal(paper):
+                self.redis_paper_misses += 1
+                continue
+            self.redis_paper_hits += 1
+            if self.local_papers_coherent:
+                size = len(msgpack.packb(paper["summary"], use_bin_type=True))
+                self.local_papers.put(pdf_links[i], paper, size, generation)
+        return papers
 
-    async def store_pdf_summary(self, pdf_link: str, summary: dict) -> None:
-        await self.pdf_summary.set(pdf_link, json.dumps(summary), ex=60)
+    async def get_pdf_summary(self, pdf_link: str) -> list:
+        paper = (await self.get_papers([pdf_link]))[0]
+        return paper["summary"] if paper else None
 
     async def get_pdf_process_status(self, pdf_link: str) -> ProcessStatus:
-        status = await self.pdf_process_status.get(pdf_link)
+        status = await self.papers.hget(self.paper_key(pdf_link), "status")
         if status is None:
             return None
         return ProcessStatus[status.decode()]
 
-    async def store_pdf_process_status(
-        self, pdf_link: str, status: ProcessStatus
+    async def acquire_pdf_leases(
+        self, pdf_links: List[str], owner: str, ttl: float
+    ) -> dict:
+        """
+        Tries to take the lease on summarizing each paper, marking the papers
+        acquired as PROCCESSING. A lease is free if nobody took it or its holder
+        stopped renewing it for ttl seconds (e.g. the worker died).
+
+        Returns:
+            dict: {pdf_link: LEASE_ACQUIRED, LEASE_HELD or LEASE_COMPLETED}
+        """
+        async with self.papers.pipeline(transaction=False) as pipe:
+            for pdf_link in pdf_links:
+                pipe.eval(
+                    ACQUIRE_SCRIPT,
+                    2,
+                    self.lease_key(pdf_link),
+                    self.paper_key(pdf_link),
+                    owner,
+                    int(ttl * 1000),
+                    time.time(),
+                    int(max(PAPER_TTL, ttl) * 1000),
+                    PAPER_INVALIDATION_CHANNEL,
+                    pdf_link,
+                )
+            results = await pipe.execute()
+        # Don't wait for the invalidations to come back over pub/sub. A paper
+        # completed elsewhere may still be stale here (e.g. FAILED), and must
+        # be reread from Redis rather than retried.
+        for pdf_link, result in zip(pdf_links, results):
+            if result in (LEASE_ACQUIRED, LEASE_COMPLETED):
+                self.local_papers.invalidate(pdf_link)
+        return dict(zip(pdf_links, results))
+
+    async def renew_pdf_leases(
+        self, pdf_links: List[str], owner: str, ttl: float
+    ) -> List[bool]:
+        """
+        Extends the leases still held by owner, and the papers' PROCCESSING status
+        with them.
+
+        Returns:
+            List[bool]: Whether each lease was still held.
+        """
+        async with self.papers.pipeline(transaction=False) as pipe:
+            for pdf_link in pdf_links:
+                pipe.eval(
+                    RENEW_SCRIPT,
+                    2,
+                    self.lease_key(pdf_link),
+                    self.paper_key(pdf_link),
+                    owner,
+                    int(ttl * 1000),
+                    int(max(PAPER_TTL, ttl) * 1000),
+                )
+            results = await pipe.execute()
+        return [bool(result) for result in results]
+
+    async def release_pdf_leases(self, owner: str, summaries: dict) -> List[bool]:
+        """
+        Releases the leases, storing each summary and marking its paper COMPLETED
+        (or FAILED if the summary is None), and wakes up the requests waiting on
+        them. Papers whose lease was lost to another worker are left untouched.
+
+        Args:
+            summaries (dict): {pdf_link: summary or None}
+
+        Returns:
+            List[bool]: Whether each lease was still held, and its paper written.
+        """
+        async with self.papers.pipeline(transaction=False) as pipe:
+            for pdf_link, summary in summaries.items():
+                status = (
+                    ProcessStatus.FAILED if summary is None else ProcessStatus.COMPLETED
+                )
+                args = [
+                    owner,
+                    status.name,
+                    time.time(),
+                    PAPER_TTL * 1000,
+                    f"pdf_status:{pdf_link}",
+                    PAPER_INVALIDATION_CHANNEL,
+                    pdf_link,
+                ]
+                if summary is not None:
+                    args.extend([*encode_summary(summary), len(summary)])
+                pipe.eval(
+                    RELEASE_SCRIPT,
+                    2,
+                    self.lease_key(pdf_link),
+                    self.paper_key(pdf_link),
+                    *args,
+                )
+            results = await pipe.execute()
+        for pdf_link in summaries:
+            self.local_papers.invalidate(pdf_link)
+        return [bool(result) for result in results]
+
+    async def refresh_papers(self, pdf_links: List[str]) -> None:
+        """
+        Keeps recently requested papers around for another PAPER_TTL seconds.
+        A paper is refreshed at most once every PAPER_TTL / 2 seconds by each
+        worker, so hot papers served from the local tier rarely hit Redis.
+        """
+        now = time.monotonic()
+        interval = PAPER_TTL / 2
+        stale = [
+            pdf_link
+            for pdf_link in pdf_links
+            if now - self.paper_refreshed_at.get(pdf_link, -interval) >= interval
+        ]
+        if not stale:
+            return
+        async with self.papers.pipeline(transaction=False) as pipe:
+            for pdf_link in stale:
+                pipe.expire(self.paper_key(pdf_link), PAPER_TTL)
+            await pipe.execute()
+        self.paper_refreshed_at = {
+            pdf_link: refreshed_at
+            for pdf_link, refreshed_at in self.paper_refreshed_at.items()
+            if now - refreshed_at < interval
+        }
+        self.paper_refreshed_at.update(dict.fromkeys(stale, now))
+
+    def get_paper_cache_stats(self) -> dict:
+        # Lookups of this worker; Redis only sees those the local tier missed
+        lookups = self.redis_paper_hits + self.redis_paper_misses
+        return {
+            "local": self.local_papers.stats(),
+            "redis": {
+                "hits": self.redis_paper_hits,
+                "misses": self.redis_paper_misses,
+                "hit_rate": (
+                    round(self.redis_paper_hits / lookups, 3) if lookups else None
+                ),
+            },
+        }
+
+    async def wait_for_pdf_process_status(
+        self, pdf_link: str, timeout: float, recheck_interval: float = 5.0
+    ) -> ProcessStatus:
+        """
+        Waits until the PDF is no longer being processed or the timeout elapses.
+        Completion is pushed over pub/sub; the status is also re-read every
+        recheck_interval seconds in case the processing worker died and its
+        status expired without a notification.
+
+        Returns:
+            ProcessStatus: Latest status, which is still PROCCESSING on timeout,
+                or None if the status expired.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        async with self.papers.pubsub() as pubsub:
+            await pubsub.subscribe(f"pdf_status:{pdf_link}")
+            # Read after subscribing so a transition in between isn't missed
+            status = await self.get_pdf_process_status(pdf_link)
+            while status == ProcessStatus.PROCCESSING:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=min(remaining, recheck_interval),
+                )
+                if message is not None:
+                    status = ProcessStatus[message["data"].decode()]
+                else:
+                    status = await self.get_pdf_process_status(pdf_link)
+        return status
+
+    async def get_arxiv_result(self, query_key: str) -> dict:
+        data = await self.arxiv_results.get(f"arxiv:{query_key}")
+        if data is None:
+            return None
+        return json.loads(data)
+
+    async def store_arxiv_result(self, query_key: str, entry: dict, ex: int) -> None:
+        await self.arxiv_results.set(f"arxiv:{query_key}", json.dumps(entry), ex=ex)
+
+    async def acquire_arxiv_refresh(self, query_key: str, ex: int) -> bool:
+        # Only one worker refreshes a stale entry at a time
+        return bool(
+            await self.arxiv_results.set(
+                f"arxiv_refresh:{query_key}", 1, ex=ex, nx=True
+            )
+        )
+
+    async def release_arxiv_refresh(self, query_key: str) -> None:
+        await self.arxiv_results.delete(f"arxiv_refresh:{query_key}")
+
+    async def incr_arxiv_cache_stat(self, field: str) -> None:
+        await self.arxiv_results.hincrby("arxiv_stats", field, 1)
+
+    async def get_arxiv_cache_stats(self) -> dict:
+        stats = await self.arxiv_results.hgetall("arxiv_stats")
+        return {key.decode(): int(value) for key, value in stats.items()}
+
+    async def get_pdf_chunks(self, pdf_hash: str, parser_version: str) -> list:
+        data = await self.pdf_chunks.get(f"chunks:{parser_version}:{pdf_hash}")
+        if data is None:
+            await self.pdf_chunks.hincrby("chunk_stats", "misses", 1)
+            return None
+        await self.pdf_chunks.hincrby("chunk_stats", "hits", 1)
+        return json.loads(data)
+
+    async def store_pdf_chunks(
+        self, pdf_hash: str, parser_version: str, chunks: list
     ) -> None:
-        await self.pdf_process_status.set(pdf_link, status.name, ex=60)
+        await self.pdf_chunks.set(
+            f"chunks:{parser_version}:{pdf_hash}",
+            json.dumps(chunks),
+            ex=int(os.getenv("CHUNK_CACHE_TTL", 7 * 24 * 3600)),
+        )
+
+    async def get_chunk_cache_stats(self) -> dict:
+        stats = await self.pdf_chunks.hgetall("chunk_stats")
+        return {key.decode(): int(value) for key, value in stats.items()}
+
+    async def create_job(self, job_id: str, pdf_link: str) -> None:
+        fields = {"status": "queued", "pdf_link": pdf_link, "created_at": time.time()}
+        await self.update_job(job_id, **fields)
+
+    async def update_job(self, job_id: str, **fields) -> None:
+        # Non-string values (e.g. the summary) are stored as JSON
+        mapping = {
+            key: value if isinstance(value, str) else json.dumps(value)
+            for key, value in fields.items()
+        }
+        await (
+            self.jobs.pipeline(transaction=True)
+            .hset(f"job:{job_id}", mapping=mapping)
+            .expire(f"job:{job_id}", JOB_TTL)
+            .execute()
+        )
+
+    async def get_job(self, job_id: str) -> dict:
+        job = await self.jobs.hgetall(f"job:{job_id}")
+        if not job:
+            return None
+        job = {key.decode(): value.decode() for key, value in job.items()}
+        for key in ("created_at", "started_at", "summary"):
+            if key in job:
+                job[key] = json.loads(job[key])
+        return job
+
+    async def append_job_event(self, job_id: str, event: dict) -> None:
+        await (
+            self.jobs.pipeline(transaction=True)
+            .xadd(f"job_events:{job_id}", {"data": json.dumps(event)})
+            .expire(f"job_events:{job_id}", JOB_TTL)
+            .hset(f"job:{job_id}", "stage", event["event"])
+            .execute()
+        )
+
+    async def read_job_events(self, job_id: str, last_id: str, block_ms: int) -> list:
+        """
+        Returns [(event_id, event)] for events after last_id, blocking up to
+        block_ms milliseconds for new ones.
+        """
+        response = await self.jobs.xread(
+            {f"job_events:{job_id}": last_id}, block=block_ms
+        )
+        if not response:
+            return []
+        _, events = response[0]
+        return [
+            (event_id.decode(), json.loads(fields[b"data"]))
+            for event_id, fields in events
+        ]
+
+    async def get_llm_cache_stats(self) -> dict:
+        stats = await self.llm_cache.hgetall("llm_stats")
+        stats = {key.decode(): int(value) for key, value in stats.items()}
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = (
+            round(stats.get("hits", 0) / lookups, 3) if lookups else None
+        )
+        return stats
 
-    async def clear_and_close(self, redis_db: aioredis.Redis) -> None:
-        if redis_db:
-            await redis_db.flushdb()
-            await redis_db.close()
+    async def get_rate_limit_stats(self) -> dict:
+        # Written by the executors' rate limiters, see rate_limiter.py. The
+        # bucket keys are listed in a set, as this db also holds the LLM cache.
+        bucket_keys = await self.llm_cache.smembers("rate_limit_buckets")
+        async with self.llm_cache.pipeline(transaction=False) as pipe:
+            pipe.hgetall("rate_limit_stats")
+            pipe.hgetall("rate_limit_concurrency")
+            for key in bucket_keys:
+                pipe.hgetall(key)
+            stats, concurrency, *bucket_states = await pipe.execute()
+        buckets = {
+            key.decode(): {
+                field.decode(): float(value) for field, value in bucket.items()
+            }
+            for key, bucket in zip(bucket_keys, bucket_states)
+            if bucket  # expired while unused
+        }
+        return {
+            "totals": {key.decode(): float(value) for key, value in stats.items()},
+            "concurrency": {
+                key.decode(): float(value) for key, value in concurrency.items()
+            },
+            "remaining": buckets,
+        }
 
     async def close(self) -> None:
-        await self.clear_and_close(self.pdf_summary)
-        await self.clear_and_close(self.pdf_process_status)
+        if self.paper_invalidation_task:
+            self.paper_invalidation_task.cancel()
+            try:
+                await self.paper_invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self.paper_invalidation_task = None
+        self.local_papers.clear()
+        # Papers and their leases are shared by every worker, so they're left
+        # to expire. Leases this worker still holds lapse after their TTL.
+        # Search results, chunks and LLM responses are keyed by their inputs and
+        # jobs may be served by other workers, so they outlive this worker too
+        for redis_db in (
+            self.papers,
+            self.arxiv_results,
+            self.pdf_chunks,
+            self.jobs,
+            self.llm_cache,
+        ):
+            if redis_db:
+                await redis_db.close()
@@ -12,9 +12,13 @@ class SparkSessionSingleton:
             cls._instance.spark = (
                 SparkSession.builder.appName(os.getenv("SPARK_APP_NAME"))
                 .master(os.getenv("SPARK_MASTER"))
+                # Executors reach Redis directly, e.g. for the LLM response cache
+                .config("spark.executorEnv.REDIS_URL", os.getenv("REDIS_URL"))
                 .getOrCreate()
             )
-            cls._instance.spark.sparkContext.addPyFile("/app/worker_files.zip")
+            cls._instance.spark.sparkContext.addPyFile(
+                os.getenv("SPARK_PY_FILES", "/app/worker_files.zip")
+            )
         return cls._instance
 
     def get_spark_session(self) -> SparkSession:
@@ -25,4 +29,4 @@ class SparkSessionSingleton:
 
     def close(self) -> None:
         self.spark.stop()
-        self._instance = None
+        SparkSessionSingleton._instance = None
@@ -1 +1,2 @@
 from .summarizer import SummarizerSingleton
+from .partitioner import partition_sections
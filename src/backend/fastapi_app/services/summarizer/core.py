@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Callable, List, Optional
 from dataclasses import dataclass
 from langchain_openai import ChatOpenAI
 
@@ -11,3 +11,4 @@ class Core:
     llm: Optional[ChatOpenAI] = None
     app: Optional[StateGraph] = None
     text_splitter: Optional[RecursiveCharacterTextSplitter] = None
+    count_tokens: Optional[Callable[[List[str]], List[int]]] = None
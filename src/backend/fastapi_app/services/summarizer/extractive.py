@@ -0,0 +1,78 @@
+import math
+import re
+from typing import Callable, List, Tuple
+import numpy as np
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"\w+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+def score_sentences(sentences: List[str]) -> np.ndarray:
+    """
+    Scores each sentence by the cosine similarity of its TF-IDF vector to the
+    centroid of the whole section, so sentences about its main topics rank first.
+    """
+    vocabulary = {}
+    rows, columns = [], []
+    for row, sentence in enumerate(sentences):
+        for word in WORD.findall(sentence.lower()):
+            rows.append(row)
+            columns.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    term_counts = np.zeros((len(sentences), max(len(vocabulary), 1)))
+    np.add.at(term_counts, (rows, columns), 1)
+
+    document_frequency = np.count_nonzero(term_counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    tfidf = term_counts * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+    centroid = tfidf.mean(axis=0)
+    centroid_norm = np.linalg.norm(centroid)
+    if centroid_norm == 0:
+        return np.zeros(len(sentences))
+    return tfidf @ (centroid / centroid_norm)
+
+
+def compress_text(
+    text: str,
+    count_tokens: Callable[[List[str]], List[int]],
+    target_tokens: int,
+    min_ratio: float = 0.0,
+) -> Tuple[str, int, int]:
+    """
+    Trims a section to about target_tokens tokens by keeping its highest-scoring
+    sentences in their original order. Sections within the budget are returned
+    unchanged.
+
+    Args:
+        text (str): The section text.
+        count_tokens (Callable): Maps texts to their token counts.
+        target_tokens (int): Token budget of the compressed section.
+        min_ratio (float): Fraction of the tokens always kept, so that very long
+            sections aren't cut down to a handful of sentences.
+
+    Returns:
+        Tuple[str, int, int]: The compressed text and its token counts before
+            and after compression.
+    """
+    sentences = split_sentences(text)
+    sentence_tokens = np.array(count_tokens(sentences), dtype=np.int64)
+    total_tokens = int(sentence_tokens.sum())
+    budget = max(target_tokens, math.ceil(min_ratio * total_tokens))
+    if total_tokens <= budget or len(sentences) < 2:
+        return text, total_tokens, total_tokens
+
+    # Greedily take the best sentences until the budget is used up
+    order = np.argsort(-score_sentences(sentences), kind="stable")
+    kept_tokens = np.cumsum(sentence_tokens[order])
+    num_kept = max(1, int(np.searchsorted(kept_tokens, budget, side="right")))
+    kept = np.sort(order[:num_kept])
+
+    compressed = " ".join(sentences[i] for i in kept)
+    return compressed, total_tokens, int(kept_tokens[num_kept - 1])
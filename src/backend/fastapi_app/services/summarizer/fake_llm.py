@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, List, Optional
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def count_words(texts: List[str]) -> List[int]:
+    """
+    Token counter of the fake backend: one token per whitespace-separated word,
+    so no tokenizer has to be downloaded.
+    """
+    return [len(text.split()) for text in texts]
+
+
+class DeterministicChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatOpenAI, used by the benchmarks. It waits a fixed
+    latency like a remote call would, then answers with output_tokens words
+    picked from the prompt, seeded by its hash so the same prompt always gets
+    the same answer.
+    """
+
+    latency: float = 0.5  # Seconds each call takes
+    output_tokens: int = 200  # Words in each answer
+
+    @property
+    def _llm_type(self) -> str:
+        return "deterministic-fake"
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = int(hashlib.sha256(prompt.encode()).hexdigest()[:8], 16)
+        words = prompt.split() or ["empty"]
+        return " ".join(
+            words[(seed + i * 7919) % len(words)] for i in range(self.output_tokens)
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        message = AIMessage(content=self.respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        message = AIMessage(content=self.respond(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def get_num_tokens(self, text: str) -> int:
+        return count_words([text])[0]
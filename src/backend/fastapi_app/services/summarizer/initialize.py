@@ -1,9 +1,10 @@
+import asyncio
+import math
 import os
 from langchain_openai import ChatOpenAI
 
 # from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langchain.chains.combine_documents.reduce import (
     acollapse_docs,
     split_list_of_docs,
@@ -19,20 +20,51 @@ import operator
 
 # Import the core module to access and modify global variables
 from .core import Core
+from .fake_llm import DeterministicChatModel, count_words
+from .llm_cache import LLMResponseCache, build_chain
+from .rate_limiter import RateLimiter
+from .tokens import build_token_counter
 
 
 config = {
     "llm": {
+        "backend": os.getenv("LLM_BACKEND", "openai"),  # "openai" or "fake"
         "model_name": "gpt-4o-mini",
         "temperature": 0,
         "max_token": 500,  # Max number of tokens to generate for each input text
         "max_retries": 2,
     },
+    "fake_llm": {
+        "latency": float(os.getenv("FAKE_LLM_LATENCY", 0.5)),  # Seconds per call
+        "output_tokens": int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", 200)),
+    },
     "langraph": {
         "chunk_size": 5000,  # Chunk the input tokens into smaller subdocs if exceeded this number
         "chunk_overlap": 0,
         "summary_token_max": 1000,  # Recursive summarization if summary exceeds this number
         "recursion_limit": 10,  # Max recursion of above step
+        "collapse_fan_in": 8,  # Max summaries combined by one reduce call
+        "collapse_concurrency": 4,  # Max reduce calls running at once per level
+    },
+    "extractive": {
+        "enabled": False,  # Trim long sections before they reach the LLM
+        "target_tokens": 2000,  # Token budget of each trimmed section
+        "min_ratio": 0.3,  # Fraction of a section's tokens always kept
+    },
+    "spark": {
+        "section_concurrency": 4,  # Max sections summarized at once per partition
+    },
+    "rate_limit": {
+        "enabled": True,  # Coordinate LLM calls of all executors through Redis
+        "requests_per_minute": 500,
+        "tokens_per_minute": 200000,
+        "initial_concurrency": 4,  # In-flight calls per executor, adapted over time
+        "max_concurrency": 16,
+        "target_latency": 20,  # Seconds; slower calls shrink the concurrency
+    },
+    "cache": {
+        "llm_responses": True,  # Reuse responses to prompts that were already sent
+        "ttl": 7 * 24 * 3600,  # Seconds a cached response is kept
     },
     "prompt": {
         "map_prompt": (
@@ -56,10 +88,22 @@ config = {
 }
 
 
-def initialize_model(core: Core):
+def build_text_splitter(config: dict = config) -> RecursiveCharacterTextSplitter:
+    """
+    Builds the text splitter that cuts sections into the documents sent to the LLM.
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=config["langraph"]["chunk_size"],
+        chunk_overlap=config["langraph"]["chunk_overlap"],
+        length_function=len,
+    )
+
+
+def initialize_model(core: Core, config: dict = config):
     """
     Initializes the LLM model, prompt chains, and the state graph.
     This function should be called only once during the application lifecycle.
+    Use get_cached_model to reuse the result across calls.
     """
     if core.llm is not None:
         print("Model is already initialized. Skipping initialization.")
@@ -70,24 +114,44 @@ def initialize_model(core: Core):
 
     # with open("./services/summarizer/config.yaml", "r") as f:
     #     config = yaml.safe_load(f)
+    backend = config["llm"]["backend"]
     model_name = config["llm"]["model_name"]
     temperature = config["llm"]["temperature"]
     max_retries = config["llm"]["max_retries"]
     max_token = config["llm"]["max_token"]
-    chunk_size = config["langraph"]["chunk_size"]
-    chunk_overlap = config["langraph"]["chunk_overlap"]
     summary_token_max = config["langraph"]["summary_token_max"]
+    collapse_fan_in = max(2, config["langraph"]["collapse_fan_in"])
+    collapse_concurrency = config["langraph"]["collapse_concurrency"]
     map_prompt_str = config["prompt"]["map_prompt"]
     reduce_prompt_str = config["prompt"]["reduce_prompt"]
 
-    os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
-    core.llm = ChatOpenAI(
-        model=model_name,
-        temperature=temperature,
-        max_tokens=max_token,
-        timeout=None,
-        max_retries=max_retries,
-    )
+    if backend not in ("openai", "fake"):
+        raise ValueError(f"Unknown LLM backend: {backend}")
+
+    if backend == "fake":
+        count_tokens = count_words
+    else:
+        count_tokens = build_token_counter(model_name)
+    limiter = None
+    if config["rate_limit"]["enabled"]:
+        limiter = RateLimiter(config["rate_limit"], config["llm"], count_tokens)
+        max_retries = 0  # the limiter retries instead, in step with other executors
+
+    if backend == "fake":
+        # Deterministic offline model, e.g. for benchmarks
+        core.llm = DeterministicChatModel(
+            latency=config["fake_llm"]["latency"],
+            output_tokens=config["fake_llm"]["output_tokens"],
+        )
+    else:
+        os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
+        core.llm = ChatOpenAI(
+            model=model_name,
+            temperature=temperature,
+            max_tokens=max_token,
+            timeout=None,
+            max_retries=max_retries,
+        )
 
     # Define prompt templates and chains for summarization
     map_prompt = ChatPromptTemplate.from_messages(
@@ -98,16 +162,21 @@ def initialize_model(core: Core):
             )
         ]
     )
-    map_chain = map_prompt | core.llm | StrOutputParser()
+    llm_cache = None
+    if config["cache"]["llm_responses"]:
+        llm_cache = LLMResponseCache(config["llm"], config["cache"]["ttl"])
+    map_chain = build_chain(map_prompt, core.llm, llm_cache, limiter)
 
     reduce_template = reduce_prompt_str
     reduce_prompt = ChatPromptTemplate.from_messages([("human", reduce_template)])
-    reduce_chain = reduce_prompt | core.llm | StrOutputParser()
+    reduce_chain = build_chain(reduce_prompt, core.llm, llm_cache, limiter)
 
     # Initialize a text splitter for chunking input text
-    core.text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len
-    )
+    core.text_splitter = build_text_splitter(config)
+    core.count_tokens = count_tokens
+
+    def merge_token_counts(token_counts: dict, new_token_counts: dict) -> dict:
+        return {**token_counts, **new_token_counts}
 
     # Define the overall state for the state graph
     class OverallState(TypedDict):
@@ -115,13 +184,22 @@ def initialize_model(core: Core):
         summaries: Annotated[list, operator.add]
         collapsed_summaries: List[Document]
         final_summary: str
+        # {text: number of tokens}, so each summary is tokenized only once
+        token_counts: Annotated[dict, merge_token_counts]
 
     class SummaryState(TypedDict):
         content: str
 
+    def count_new_tokens(documents: List[Document], token_counts: dict) -> dict:
+        """
+        Tokenizes, in one batch, the documents whose count isn't known yet.
+        """
+        texts = list({doc.page_content for doc in documents} - token_counts.keys())
+        return dict(zip(texts, count_tokens(texts)))
+
     # Define a function to calculate the total number of tokens
-    def length_function(documents: List[Document]) -> int:
-        return sum(core.llm.get_num_tokens(doc.page_content) for doc in documents)
+    def length_function(documents: List[Document], token_counts: dict) -> int:
+        return sum(token_counts[doc.page_content] for doc in documents)
 
     # Define the nodes for the state graph
     async def generate_summary(state: SummaryState):
@@ -144,24 +222,57 @@ def initialize_model(core: Core):
         """
         Collects summaries and converts them into Document objects.
         """
+        documents = [Document(summary) for summary in state["summaries"]]
         return {
-            "collapsed_summaries": [Document(summary) for summary in state["summaries"]]
+            "collapsed_summaries": documents,
+            "token_counts": count_new_tokens(documents, {}),
         }
 
+    def split_evenly(doc_list: List[Document]) -> List[List[Document]]:
+        """
+        Splits documents into the fewest groups of at most collapse_fan_in, with
+        sizes as even as possible, so no group is left with a single document.
+        """
+        num_groups = math.ceil(len(doc_list) / collapse_fan_in)
+        bounds = [
+            math.ceil(i * len(doc_list) / num_groups) for i in range(num_groups + 1)
+        ]
+        return [doc_list[start:end] for start, end in zip(bounds, bounds[1:])]
+
     async def collapse_summaries(state: OverallState):
         """
-        Reduces the number of summaries by collapsing them iteratively.
+        Reduces the number of summaries by collapsing them iteratively. Each call
+        is one level of a tree reduction: groups of at most summary_token_max
+        tokens and collapse_fan_in summaries are reduced concurrently.
         """
-        doc_lists = split_list_of_docs(
-            state["collapsed_summaries"], length_function, summary_token_max
-        )
-        results = []
-        for doc_list in doc_lists:
-            summaries = await acollapse_docs(doc_list, reduce_chain.ainvoke)
-            results.extend(summaries)
+        token_counts = state["token_counts"]
+        doc_lists = [
+            group
+            for doc_list in split_list_of_docs(
+                state["collapsed_summaries"],
+                lambda documents: length_function(documents, token_counts),
+                summary_token_max,
+            )
+            for group in split_evenly(doc_list)
+        ]
+        # A lone document wouldn't shrink the count, so it's carried over to the
+        # next level, unless nothing else is left to reduce
+        reduces = any(len(doc_list) > 1 for doc_list in doc_lists)
+
+        semaphore = asyncio.Semaphore(collapse_concurrency)
 
+        async def collapse(doc_list: List[Document]) -> Document:
+            if len(doc_list) == 1 and reduces:
+                return doc_list[0]
+            async with semaphore:
+                return await acollapse_docs(doc_list, reduce_chain.ainvoke)
+
+        results = await asyncio.gather(*(collapse(docs) for docs in doc_lists))
+
+        documents = [Document(page_content=res.page_content) for res in results]
         return {
-            "collapsed_summaries": [Document(page_content=str(res)) for res in results]
+            "collapsed_summaries": documents,
+            "token_counts": count_new_tokens(documents, token_counts),
         }
 
     def should_collapse(
@@ -170,7 +281,9 @@ def initialize_model(core: Core):
         """
         Determines whether further collapsing of summaries is needed.
         """
-        num_tokens = length_function(state["collapsed_summaries"])
+        num_tokens = length_function(
+            state["collapsed_summaries"], state["token_counts"]
+        )
         if num_tokens > summary_token_max:
             return "collapse_summaries"
         else:
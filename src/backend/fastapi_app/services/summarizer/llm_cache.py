@@ -0,0 +1,90 @@
+import hashlib
+import json
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+from .rate_limiter import RateLimiter
+from .redis_client import get_executor_redis
+
+# Reads a cached response and counts the hit or miss in one round trip.
+# KEYS[1] is the response key and KEYS[2] the stats hash.
+GET_SCRIPT = """
+local response = redis.call('GET', KEYS[1])
+redis.call('HINCRBY', KEYS[2], response and 'hits' or 'misses', 1)
+return response
+"""
+
+
+class LLMResponseCache:
+    """
+    Redis cache of LLM responses keyed by the rendered prompt and the model
+    settings.
+    """
+
+    def __init__(self, llm_config: dict, ttl: int):
+        # Only the settings that change the response are part of the key
+        self.model_settings = json.dumps(
+            {
+                "backend": llm_config["backend"],
+                "model_name": llm_config["model_name"],
+                "temperature": llm_config["temperature"],
+                "max_token": llm_config["max_token"],
+            },
+            sort_keys=True,
+        )
+        self.ttl = ttl
+
+    def key(self, prompt: str) -> str:
+        digest = hashlib.sha256(f"{self.model_settings}\0{prompt}".encode())
+        return f"llm:{digest.hexdigest()}"
+
+    async def get(self, prompt: str) -> str:
+        try:
+            response = await get_executor_redis().eval(
+                GET_SCRIPT, 2, self.key(prompt), "llm_stats"
+            )
+        except Exception as e:
+            # The cache must never fail a summary
+            print(f"LLM cache lookup failed: {e}")
+            return None
+        return None if response is None else response.decode()
+
+    async def set(self, prompt: str, response: str) -> None:
+        try:
+            await get_executor_redis().set(self.key(prompt), response, ex=self.ttl)
+        except Exception as e:
+            print(f"LLM cache store failed: {e}")
+
+
+def build_chain(
+    prompt: ChatPromptTemplate,
+    llm,
+    cache: LLMResponseCache = None,
+    limiter: RateLimiter = None,
+) -> Runnable:
+    """
+    Builds the prompt | llm | parser chain, answering from the cache when the
+    same rendered prompt was already sent to the same model settings, and
+    sending the rest through the rate limiter.
+    """
+    chain = prompt | llm | StrOutputParser()
+    if cache is None and limiter is None:
+        return chain
+
+    async def invoke(inputs) -> str:
+        rendered = (await prompt.ainvoke(inputs)).to_string()
+        if cache is not None:
+            response = await cache.get(rendered)
+            if response is not None:
+                return response
+
+        if limiter is None:
+            response = await chain.ainvoke(inputs)
+        else:
+            response = await limiter.run(lambda: chain.ainvoke(inputs), rendered)
+
+        if cache is not None:
+            await cache.set(rendered, response)
+        return response
+
+    return RunnableLambda(invoke)
@@ -0,0 +1,39 @@
+import hashlib
+import json
+import threading
+import time
+from .core import Core
+from .initialize import initialize_model, config
+
+# Module state lives as long as the Python worker process, so Spark executors
+# (which reuse their Python workers by default) build the model only once
+_lock = threading.Lock()
+_cached = {"fingerprint": None, "core": None}
+
+
+def config_fingerprint(config: dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def get_cached_model(config: dict = config) -> tuple:
+    """
+    Returns the Core initialized for the given config, building it only if this
+    process hasn't built one yet or the config changed since.
+
+    Args:
+        config (dict): Summarizer config, as in initialize.config.
+
+    Returns:
+        tuple: (core, build_seconds) where build_seconds is None if the cached
+            core was reused.
+    """
+    fingerprint = config_fingerprint(config)
+    with _lock:
+        if _cached["core"] is not None and _cached["fingerprint"] == fingerprint:
+            return _cached["core"], None
+
+        start_time = time.time()
+        core = initialize_model(Core(), config)
+        build_seconds = time.time() - start_time
+        _cached.update(fingerprint=fingerprint, core=core)
+        return core, build_seconds
@@ -0,0 +1,52 @@
+import heapq
+from pyspark import SparkContext
+from pyspark.rdd import RDD
+from .initialize import build_text_splitter, config
+
+
+def estimate_section_cost(text: str, text_splitter) -> int:
+    """
+    Estimates the cost of summarizing a section as the number of LLM calls it
+    needs: one map call per split document plus the final reduce call.
+    """
+    return len(text_splitter.split_text(text)) + 1
+
+
+def balance_sections(sections: list, num_bins: int, config: dict = config) -> list:
+    """
+    Bin-packs sections into num_bins groups of similar total cost, placing the
+    most expensive sections first into the currently cheapest group (LPT).
+
+    Returns:
+        list: num_bins lists of sections (some may be empty if there are fewer
+            sections than bins).
+    """
+    text_splitter = build_text_splitter(config)
+    costs = [
+        estimate_section_cost(section["text"], text_splitter) for section in sections
+    ]
+
+    bins = [[] for _ in range(num_bins)]
+    loads = [(0, i) for i in range(num_bins)]  # (total cost, bin index) min-heap
+    for position in sorted(range(len(sections)), key=lambda i: -costs[i]):
+        load, i = heapq.heappop(loads)
+        bins[i].append(sections[position])
+        heapq.heappush(loads, (load + costs[position], i))
+    return bins
+
+
+def partition_sections(
+    spark_context: SparkContext, sections: list, num_partitions: int = None
+) -> RDD:
+    """
+    Builds an RDD of sections whose partitions have balanced summarization cost,
+    with one partition per available core by default. Partitions don't preserve
+    the order of sections, so tag them with an "index" to restore it.
+    """
+    if num_partitions is None:
+        num_partitions = spark_context.defaultParallelism
+    num_partitions = max(1, min(num_partitions, len(sections)))
+
+    bins = balance_sections(sections, num_partitions)
+    # One bin per slice, so each partition holds exactly one bin
+    return spark_context.parallelize(bins, num_partitions).flatMap(lambda bin: bin)
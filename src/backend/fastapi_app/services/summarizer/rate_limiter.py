@@ -0,0 +1,186 @@
+import asyncio
+import os
+import random
+import socket
+import time
+import openai
+from typing import Awaitable, Callable, List
+from .redis_client import get_executor_redis
+
+# Refills and takes from the request and token buckets in one atomic step, and
+# registers the bucket key in the set KEYS[2] so stats don't have to scan for it.
+# Returns 0 if both had enough, otherwise the milliseconds to wait before retrying.
+TOKEN_BUCKET_SCRIPT = """
+local now_time = redis.call('TIME')
+local now = tonumber(now_time[1]) * 1000 + math.floor(tonumber(now_time[2]) / 1000)
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), tpm)
+
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'updated_at')
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now)) / 60000
+requests = math.min(rpm, requests + elapsed * rpm)
+tokens = math.min(tpm, tokens + elapsed * tpm)
+
+local wait = 0
+if requests < 1 then
+    wait = math.max(wait, (1 - requests) / rpm * 60000)
+end
+if tokens < cost then
+    wait = math.max(wait, (cost - tokens) / tpm * 60000)
+end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - cost
+end
+
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], 120000)
+redis.call('SADD', KEYS[2], KEYS[1])
+return math.ceil(wait)
+"""
+
+# Set of the bucket keys, read by RedisSingleton.get_rate_limit_stats
+BUCKETS_KEY = "rate_limit_buckets"
+
+# Errors worth retrying once the limiter lets the call through again
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class AdaptiveConcurrency:
+    """
+    Per-process cap on in-flight LLM calls that adapts with AIMD: it grows
+    slowly while calls finish within the target latency, and halves on 429s.
+    """
+
+    def __init__(self, initial: int, maximum: int, target_latency: float):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.conditions = {}  # {event loop: condition}
+
+    def condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if loop not in self.conditions:
+            self.conditions[loop] = asyncio.Condition()
+        return self.conditions[loop]
+
+    async def acquire(self) -> None:
+        async with self.condition():
+            await self.condition().wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self.condition():
+            self.in_flight -= 1
+            self.condition().notify_all()
+
+    def on_success(self, latency: float) -> None:
+        if latency <= self.target_latency:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        else:
+            self.limit = max(1.0, self.limit * 0.9)
+
+    def on_rate_limited(self) -> None:
+        self.limit = max(1.0, self.limit / 2)
+
+
+class RateLimiter:
+    """
+    Rate limiter shared by every executor through Redis: token buckets for
+    requests and tokens per minute, plus an adaptive local concurrency cap.
+    """
+
+    def __init__(
+        self,
+        rate_limit_config: dict,
+        llm_config: dict,
+        count_tokens: Callable[[List[str]], List[int]],
+    ):
+        self.requests_per_minute = rate_limit_config["requests_per_minute"]
+        self.tokens_per_minute = rate_limit_config["tokens_per_minute"]
+        self.max_retries = llm_config["max_retries"]
+        self.max_output_tokens = llm_config["max_token"]
+        self.count_tokens = count_tokens
+        self.key = f"rate_limit:{llm_config['backend']}:{llm_config['model_name']}"
+        self.concurrency = AdaptiveConcurrency(
+            rate_limit_config["initial_concurrency"],
+            rate_limit_config["max_concurrency"],
+            rate_limit_config["target_latency"],
+        )
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def record(self, **counts) -> None:
+        try:
+            async with get_executor_redis().pipeline(transaction=False) as pipe:
+                for field, count in counts.items():
+                    pipe.hincrbyfloat("rate_limit_stats", field, count)
+                pipe.hset(
+                    "rate_limit_concurrency",
+                    self.worker_id,
+                    round(self.concurrency.limit, 2),
+                )
+                await pipe.execute()
+        except Exception as e:
+            print(f"Recording rate limit stats failed: {e}")
+
+    async def wait_for_budget(self, tokens: int) -> None:
+        """
+        Waits until the shared buckets have room for one request of the given
+        number of tokens and takes it. Lets the call through if Redis is down.
+        """
+        waited_ms = 0
+        while True:
+            try:
+                wait_ms = await get_executor_redis().eval(
+                    TOKEN_BUCKET_SCRIPT,
+                    2,
+                    self.key,
+                    BUCKETS_KEY,
+                    self.requests_per_minute,
+                    self.tokens_per_minute,
+                    tokens,
+                )
+            except Exception as e:
+                print(f"Rate limiter unavailable, not throttling: {e}")
+                return
+            if wait_ms == 0:
+                break
+            waited_ms += wait_ms
+            # Jitter so throttled callers don't retry in lockstep
+            await asyncio.sleep(wait_ms / 1000 * random.uniform(1, 1.2))
+        await self.record(requests=1, tokens=tokens, throttled_ms=waited_ms)
+
+    async def run(self, call: Callable[[], Awaitable], prompt: str):
+        """
+        Runs an LLM call for the rendered prompt once the budget allows it,
+        retrying retryable errors with exponential backoff up to max_retries times.
+        """
+        # Budget for the worst case: the prompt plus the max completion length
+        tokens = self.count_tokens([prompt])[0] + self.max_output_tokens
+        for attempt in range(self.max_retries + 1):
+            await self.wait_for_budget(tokens)
+            await self.concurrency.acquire()
+            start_time = time.time()
+            try:
+                response = await call()
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.RateLimitError):
+                    self.concurrency.on_rate_limited()
+                    await self.record(rate_limited=1)
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(2**attempt * random.uniform(0.5, 1.5))
+                continue
+            finally:
+                await self.concurrency.release()
+            self.concurrency.on_success(time.time() - start_time)
+            return response
@@ -0,0 +1,20 @@
+import aioredis
+import asyncio
+import os
+
+EXECUTOR_REDIS_DB = 5  # Redis database shared by the driver and the executors
+
+_clients = {}  # {event loop: client}, as clients are bound to the loop they run on
+
+
+def get_executor_redis() -> aioredis.Redis:
+    """
+    Returns a Redis client for the running event loop. Executors can't use
+    RedisSingleton, which lives on the driver, so they connect on their own.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _clients:
+        _clients[loop] = aioredis.from_url(
+            f'{os.environ["REDIS_URL"]}/{EXECUTOR_REDIS_DB}'
+        )
+    return _clients[loop]
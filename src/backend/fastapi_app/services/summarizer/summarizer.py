@@ -1,9 +1,19 @@
-from .initialize import initialize_model
-from .summary import summary
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .extractive import compress_text
+from .initialize import config
+from .model_cache import get_cached_model
+from .summary import summarize_concurrently
 from services.spark import *
 from services.redis import *
 from pyspark.rdd import RDD
-from .core import Core
+
+# Local properties of the submitting thread that its jobs are tagged with, e.g.
+# the job group they're cancelled by
+JOB_PROPERTIES = (
+    "spark.jobGroup.id",
+    "spark.job.description",
+    "spark.job.interruptOnCancel",
+)
 
 
 class SummarizerSingleton:
@@ -12,16 +22,105 @@ class SummarizerSingleton:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SummarizerSingleton, cls).__new__(cls)
+            # Executors report how often they build vs reuse the model
+            spark_context = SparkSessionSingleton().get_spark_context()
+            cls._instance.model_builds = spark_context.accumulator(0)
+            cls._instance.model_build_seconds = spark_context.accumulator(0.0)
+            cls._instance.model_reuses = spark_context.accumulator(0)
+            # ...and how much the extractive stage trims off the sections
+            cls._instance.extractive_sections = spark_context.accumulator(0)
+            cls._instance.extractive_tokens_in = spark_context.accumulator(0)
+            cls._instance.extractive_tokens_out = spark_context.accumulator(0)
         return cls._instance
 
+    def get_model_cache_stats(self) -> dict:
+        return {
+            "builds": self.model_builds.value,
+            "build_seconds": round(self.model_build_seconds.value, 3),
+            "reuses": self.model_reuses.value,
+        }
+
+    def get_extractive_stats(self) -> dict:
+        tokens_in = self.extractive_tokens_in.value
+        tokens_out = self.extractive_tokens_out.value
+        return {
+            "enabled": config["extractive"]["enabled"],
+            "sections": self.extractive_sections.value,
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "ratio": round(tokens_out / tokens_in, 3) if tokens_in else None,
+        }
+
     def summarize_chunked_sections(self, chunked_sections: RDD) -> RDD:
+        # Bind to locals so the closure doesn't capture (and pickle) self
+        model_config = config
+        model_builds = self.model_builds
+        model_build_seconds = self.model_build_seconds
+        model_reuses = self.model_reuses
+        extractive_sections = self.extractive_sections
+        extractive_tokens_in = self.extractive_tokens_in
+        extractive_tokens_out = self.extractive_tokens_out
+
         def summarize_chunks_in_partition(partition):
-            core = initialize_model(Core())
+            core, build_seconds = get_cached_model(model_config)
+            if build_seconds is None:
+                model_reuses.add(1)
+            else:
+                model_builds.add(1)
+                model_build_seconds.add(build_seconds)
+
+            # Summarize all sections of the partition at once, as they're I/O-bound
+            chunks = list(partition)
+            texts = [chunk["text"] for chunk in chunks]
+            extractive = model_config["extractive"]
+            if extractive["enabled"]:
+                for i, text in enumerate(texts):
+                    texts[i], tokens_in, tokens_out = compress_text(
+                        text,
+                        core.count_tokens,
+                        extractive["target_tokens"],
+                        extractive["min_ratio"],
+                    )
+                    extractive_sections.add(1)
+                    extractive_tokens_in.add(tokens_in)
+                    extractive_tokens_out.add(tokens_out)
 
-            for chunk in partition:
-                header = chunk["header"]
-                text = chunk["text"]
-                summarized_chunk = summary(text, core)
-                yield {"header": header, "summary": summarized_chunk["final_summary"]}
+            summarized_chunks = summarize_concurrently(
+                texts,
+                core,
+                model_config["spark"]["section_concurrency"],
+            )
+
+            for chunk, summarized_chunk in zip(chunks, summarized_chunks):
+                # Keep the header and any tags (e.g. "index") callers use to
+                # regroup or reorder results
+                result = {key: value for key, value in chunk.items() if key != "text"}
+                result["summary"] = summarized_chunk["final_summary"]
+                yield result
 
         return chunked_sections.mapPartitions(summarize_chunks_in_partition)
+
+    def stream_chunked_sections(self, chunked_sections: RDD):
+        """
+        Yields section summaries as soon as the partition holding them finishes,
+        in completion order. Each partition is submitted as its own Spark job
+        from a separate thread so they still run in parallel. The jobs carry the
+        calling thread's job group, so cancelling the group cancels them.
+        """
+        summaries = self.summarize_chunked_sections(chunked_sections)
+        spark_context = summaries.context
+        num_partitions = summaries.getNumPartitions()
+        # Pool threads don't inherit the JVM local properties in pinned thread mode
+        properties = {
+            key: spark_context.getLocalProperty(key) for key in JOB_PROPERTIES
+        }
+
+        def run_partition(i: int) -> list:
+            for key, value in properties.items():
+                spark_context.setLocalProperty(key, value)
+            return spark_context.runJob(summaries, lambda part: part, [i])
+
+        with ThreadPoolExecutor(max_workers=max(num_partitions, 1)) as pool:
+            jobs = [pool.submit(run_partition, i) for i in range(num_partitions)]
+            for job in as_completed(jobs):
+                yield from job.result()
@@ -5,6 +5,48 @@ from langchain_core.documents import Document
 from .core import Core
 
 
+def check_initialized(core: Core) -> None:
+    if core.llm is None or core.app is None or core.text_splitter is None:
+        raise ValueError(
+            "Model is not initialized. Please call `initialize_model()` first."
+        )
+
+
+async def asummary(input_text: str, core: Core) -> str:
+    """
+    Asynchronously summarizes the given input text by splitting it into chunks,
+    processing it through the state graph, and returning the final summary.
+
+    Args:
+        input_text (str): The text to summarize.
+
+    Returns:
+        str: The final summary of the input text.
+    """
+    check_initialized(core)
+
+    # Split the input text into smaller chunks
+    docs = [Document(page_content=input_text)]
+    split_docs = core.text_splitter.split_documents(docs)
+    print(f"Generated {len(split_docs)} split documents.")
+
+    final_summary = None  # Variable to store the final summary
+    steps = core.app.astream(
+        {"contents": [doc.page_content for doc in split_docs]},
+        {"recursion_limit": 100},
+    )
+    try:
+        async for step in steps:
+            if "generate_final_summary" in step:
+                # print("Final Summary:", step["generate_final_summary"])
+                final_summary = step["generate_final_summary"]
+                break  # Gracefully exit the loop
+    finally:
+        await steps.aclose()  # Explicitly close the generator
+
+    return final_summary
+
+
 def summary(input_text: str, core: Core) -> str:
     """
     Summarizes the given input text by splitting it into chunks,
@@ -16,33 +58,35 @@ def summary(input_text: str, core: Core) -> str:
     Returns:
         str: The final summary of the input text.
     """
-    if core.llm is None or core.app is None or core.text_splitter is None:
-        raise ValueError(
-            "Model is not initialized. Please call `initialize_model()` first."
-        )
+    check_initialized(core)
 
-    async def process_steps():
-        # Split the input text into smaller chunks
-        docs = [Document(page_content=input_text)]
-        split_docs = core.text_splitter.split_documents(docs)
-        print(f"Generated {len(split_docs)} split documents.")
+    # Run the asynchronous workflow using the event loop
+    loop = asyncio.get_event_loop()
+    return loop.run_until_complete(asummary(input_text, core))
 
-        final_summary = None  # Variable to store the final summary
-        steps = core.app.astream(
-            {"contents": [doc.page_content for doc in split_docs]},
-            {"recursion_limit": 100},
-        )
-        try:
-            async for step in steps:
-                if "generate_final_summary" in step:
-                    # print("Final Summary:", step["generate_final_summary"])
-                    final_summary = step["generate_final_summary"]
-                    break  # Gracefully exit the loop
-        finally:
-            await steps.aclose()  # Explicitly close the generator
 
-        return final_summary
+def summarize_concurrently(input_texts: list, core: Core, max_concurrency: int) -> list:
+    """
+    Summarizes several texts concurrently on one event loop, since the work is
+    dominated by waiting on the LLM.
+
+    Args:
+        input_texts (list): The texts to summarize.
+        max_concurrency (int): Max number of texts summarized at the same time.
+
+    Returns:
+        list: The final summary of each text, in the same order as input_texts.
+    """
+    check_initialized(core)
+
+    async def process_all():
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def process(input_text: str):
+            async with semaphore:
+                return await asummary(input_text, core)
+
+        return await asyncio.gather(*(process(text) for text in input_texts))
 
-    # Run the asynchronous workflow using the event loop
     loop = asyncio.get_event_loop()
-    return loop.run_until_complete(process_steps())
+    return loop.run_until_complete(process_all())